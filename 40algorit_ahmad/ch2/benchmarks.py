@@ -0,0 +1,415 @@
+'''
+Benchmarks for the chapter 2 abstract data types.
+Author: Nat Hawkins
+Date (YYYY-MM-DD): 2026-10-18
+'''
+
+# Imports ----------------------------------------------------------------------
+from argparse import ArgumentParser
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+# Note: run from this directory so `queue` resolves to ch2/queue.py. It
+# provides the Empty/Full exceptions multiprocessing expects from `queue`
+from queue import Queue, AsyncQueue
+from shared_queue import SharedQueue
+from stack import Stack
+from tree import Tree
+
+# Imported up front so numpy's import time is not charged to Tree.freeze()
+from compact_tree import CompactTree
+
+# Functions --------------------------------------------------------------------
+def constructCommandLineArguments():
+    parser = ArgumentParser()
+    parser.add_argument("-s", "--structure",
+                        help = "Data structure to benchmark. Accepted inputs 'queue', 'asyncqueue', 'sharedqueue', 'stack', 'tree' or 'treefile'. Default: 'queue'.",
+                        default = 'queue')
+    parser.add_argument("-e", "--max-exponent",
+                        help = "Largest problem size to run, as a power of ten. Default: 7.",
+                        default = 7,
+                        type = int)
+    parser.add_argument("-p", "--producers",
+                        help = "Number of concurrent producers (asyncqueue). Default: 4.",
+                        default = 4,
+                        type = int)
+    parser.add_argument("-c", "--consumers",
+                        help = "Number of concurrent consumers (asyncqueue). Default: 4.",
+                        default = 4,
+                        type = int)
+    return parser
+
+def benchmarkQueue(max_exponent = 7, batch = 1000):
+    '''
+    Time enqueue/dequeue of n items for n = 10^3 ... 10^max_exponent and
+    report the per-operation latency in nanoseconds.
+
+    Parameters
+    ----------
+    - max_exponent (int): Largest problem size as a power of ten. Default 7.
+    - batch (int): Batch size used for enqueue_many/dequeue_many. Default 1000.
+
+    Returns
+    -------
+    list: One dict per problem size with per-op timings in nanoseconds.
+    '''
+    results = []
+    for exponent in range(3, max_exponent + 1):
+        n     = 10**exponent
+        items = range(n)
+        queue = Queue()
+
+        # Single item operations
+        start_ = time.perf_counter()
+        for item in items:
+            queue.enqueue(item)
+        enqueue_ns = (time.perf_counter() - start_)/n*1e9
+
+        start_ = time.perf_counter()
+        while not queue.isEmpty():
+            queue.dequeue()
+        dequeue_ns = (time.perf_counter() - start_)/n*1e9
+
+        # Bulk operations
+        start_ = time.perf_counter()
+        queue.enqueue_many(items)
+        while not queue.isEmpty():
+            queue.dequeue_many(batch)
+        bulk_ns = (time.perf_counter() - start_)/n*1e9
+
+        results.append({"n": n,
+                        "enqueue_ns": round(enqueue_ns, 1),
+                        "dequeue_ns": round(dequeue_ns, 1),
+                        "bulk_round_trip_ns": round(bulk_ns, 1)})
+    return results
+
+async def _runPipeline(n, producers, consumers, capacity, batch):
+    # Run n items from the producers through the queue to the consumers
+    queue = AsyncQueue(capacity = capacity)
+    stop  = object()
+
+    async def produce(count):
+        for item in range(count):
+            await queue.enqueue(item)
+
+    async def consume():
+        received = 0
+        while True:
+            if batch > 1:
+                items = await queue.dequeue_many(batch, timeout = 0.1)
+            else:
+                items = [await queue.dequeue()]
+            for i, item in enumerate(items):
+                if item is stop:
+                    # A batch may hold several stop markers, hand the others back
+                    for extra in items[i + 1:]:
+                        await queue.enqueue(extra)
+                    return received
+                received += 1
+
+    # Split the work evenly, handing any remainder to the first producer
+    counts = [n//producers]*producers
+    counts[0] += n - sum(counts)
+
+    consumer_tasks = [asyncio.create_task(consume()) for _ in range(consumers)]
+    await asyncio.gather(*(produce(count) for count in counts))
+    for _ in range(consumers):
+        await queue.enqueue(stop)
+
+    return sum(await asyncio.gather(*consumer_tasks))
+
+def benchmarkAsyncQueue(max_exponent = 6, producers = 4, consumers = 4, capacity = 1000):
+    '''
+    Measure AsyncQueue throughput with N producers and M consumers sharing
+    one bounded queue, for single-item and batched consumers.
+
+    Parameters
+    ----------
+    - max_exponent (int): Largest number of items as a power of ten. Default 6.
+    - producers (int): Number of producer coroutines. Default 4.
+    - consumers (int): Number of consumer coroutines. Default 4.
+    - capacity (int): Queue capacity used to apply backpressure. Default 1000.
+
+    Returns
+    -------
+    list: One dict per problem size with throughput in items per second.
+    '''
+    results = []
+    for exponent in range(3, max_exponent + 1):
+        n   = 10**exponent
+        row = {"n": n, "producers": producers, "consumers": consumers}
+        for batch in (1, 100):
+            start_   = time.perf_counter()
+            received = asyncio.run(_runPipeline(n, producers, consumers, capacity, batch))
+            elapsed  = time.perf_counter() - start_
+            assert received == n, f"Expected {n} items, consumers received {received}."
+            row[f"items_per_s_batch_{batch}"] = round(n/elapsed)
+        results.append(row)
+    return results
+
+def _produceShared(queue, n, batch):
+    # Push n (int64, float64) records, spinning while the ring buffer is full
+    for start in range(0, n, batch):
+        records = [(i, i/2) for i in range(start, min(start + batch, n))]
+        while queue.capacity - queue.size() < len(records):
+            pass
+        queue.enqueue_many(records)
+    queue.close()
+
+def _produceStdlib(queue, n):
+    for i in range(n):
+        queue.put((i, i/2))
+
+def benchmarkSharedQueue(max_exponent = 6, capacity = 4096):
+    '''
+    Measure cross-process throughput of one producer process sending
+    (int64, float64) records to the parent process, through a SharedQueue
+    (single and batched records) and through multiprocessing.Queue.
+
+    Parameters
+    ----------
+    - max_exponent (int): Largest number of records as a power of ten. Default 6.
+    - capacity (int): Ring buffer slots for the SharedQueue. Default 4096.
+
+    Returns
+    -------
+    list: One dict per problem size with throughput in records per second.
+    '''
+    results = []
+    for exponent in range(3, max_exponent + 1):
+        n   = 10**exponent
+        row = {"n": n}
+
+        for batch in (1, 256):
+            queue    = SharedQueue('qd', capacity = capacity)
+            producer = multiprocessing.Process(target = _produceShared, args = (queue, n, batch))
+            start_   = time.perf_counter()
+            producer.start()
+            received = 0
+            while received < n:
+                received += len(queue.dequeue_many(batch))
+            row[f"shared_b{batch}_per_s"] = round(n/(time.perf_counter() - start_))
+            producer.join()
+            queue.close()
+            queue.unlink()
+
+        queue    = multiprocessing.Queue()
+        producer = multiprocessing.Process(target = _produceStdlib, args = (queue, n))
+        start_   = time.perf_counter()
+        producer.start()
+        for _ in range(n):
+            queue.get()
+        row["stdlib_per_s"] = round(n/(time.perf_counter() - start_))
+        producer.join()
+
+        results.append(row)
+    return results
+
+def benchmarkStack(max_exponent = 7, batch = 1000):
+    '''
+    Compare the list-backed Stack against a typed (int64) Stack holding
+    integer node ids: bytes per item and push/pop throughput.
+
+    Parameters
+    ----------
+    - max_exponent (int): Largest problem size as a power of ten. Default 7.
+    - batch (int): Batch size used for push_many/pop_many. Default 1000.
+
+    Returns
+    -------
+    list: One dict per problem size and stack type.
+    '''
+    results = []
+    for exponent in range(3, max_exponent + 1):
+        n = 10**exponent
+        for typecode in (None, 'q'):
+            # Ids above the small int cache so the list holds real int objects
+            ids = range(1000, 1000 + n)
+
+            # Memory of the populated stack, items included
+            tracemalloc.start()
+            stack = Stack(typecode = typecode)
+            for item in ids:
+                stack.push(item)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            start_ = time.perf_counter()
+            while not stack.isEmpty():
+                stack.pop()
+            single_ns = (time.perf_counter() - start_)/n*1e9
+
+            start_ = time.perf_counter()
+            for item in ids:
+                stack.push(item)
+            push_ns = (time.perf_counter() - start_)/n*1e9
+
+            start_ = time.perf_counter()
+            for first in range(0, n, batch):
+                stack.push_many(ids[first:first + batch])
+            while not stack.isEmpty():
+                stack.pop_many(batch)
+            bulk_ns = (time.perf_counter() - start_)/(2*n)*1e9
+
+            results.append({"n": n,
+                            "stack": 'list' if typecode is None else f"array('{typecode}')",
+                            "bytes_per_item": round(memory/n, 1),
+                            "push_ns": round(push_ns, 1),
+                            "pop_ns": round(single_ns, 1),
+                            "bulk_ns": round(bulk_ns, 1)})
+    return results
+
+def buildRandomTree(n, seed = 8675309):
+    '''
+    Build an n-node Tree where every node after the first hangs off a
+    uniformly random earlier node.
+
+    Parameters
+    ----------
+    - n (int): Number of nodes.
+    - seed (int): Random seed for reproducibility. Default 8675309.
+
+    Returns
+    -------
+    Tree: Tree rooted at label 0.
+    '''
+    random.seed(seed)
+    tree = Tree()
+    for label in range(n):
+        tree.addNode(label, val = label)
+    for label in range(1, n):
+        tree.connectNode(random.randrange(label), label)
+    return tree
+
+def benchmarkTree(max_exponent = 6):
+    '''
+    Time building a random n-node Tree, walking it with each traversal,
+    freezing it to a CompactTree and answering a batch of n LCA queries.
+
+    Parameters
+    ----------
+    - max_exponent (int): Largest number of nodes as a power of ten. Default 6.
+
+    Returns
+    -------
+    list: One dict per problem size with per-node timings in nanoseconds.
+    '''
+    results = []
+    for exponent in range(3, max_exponent + 1):
+        n   = 10**exponent
+        row = {"n": n}
+
+        start_ = time.perf_counter()
+        tree   = buildRandomTree(n)
+        row["build_ns"] = round((time.perf_counter() - start_)/n*1e9, 1)
+
+        for order in ('preorder', 'postorder', 'levelorder'):
+            start_  = time.perf_counter()
+            visited = sum(1 for _ in getattr(tree, order)())
+            assert visited == n, f"{order} visited {visited} of {n} nodes."
+            row[f"{order}_ns"] = round((time.perf_counter() - start_)/n*1e9, 1)
+
+        # Frozen form, then one batch of n random LCA queries
+        start_  = time.perf_counter()
+        compact = tree.freeze()
+        row["freeze_ns"] = round((time.perf_counter() - start_)/n*1e9, 1)
+
+        a      = [random.randrange(n) for _ in range(n)]
+        b      = [random.randrange(n) for _ in range(n)]
+        start_ = time.perf_counter()
+        compact.lca(a, b)
+        row["batch_lca_ns"] = round((time.perf_counter() - start_)/n*1e9, 1)
+
+        results.append(row)
+    return results
+
+def benchmarkTreeFile(max_exponent = 7, queries = 10**5):
+    '''
+    Round trip a random n-node Tree through Tree.save()/Tree.load(): time to
+    save, to memory map and answer a first batch of LCA queries, and to
+    rebuild the full Node-based Tree.
+
+    Parameters
+    ----------
+    - max_exponent (int): Largest number of nodes as a power of ten. Default 7.
+    - queries (int): Size of the first batch of LCA queries. Default 10^5.
+
+    Returns
+    -------
+    list: One dict per problem size with timings in seconds.
+    '''
+    results = []
+    for exponent in range(3, max_exponent + 1):
+        n    = 10**exponent
+        tree = buildRandomTree(n)
+        a    = [random.randrange(n) for _ in range(queries)]
+        b    = [random.randrange(n) for _ in range(queries)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tree.bin')
+
+            start_ = time.perf_counter()
+            tree.save(path)
+            save_s = time.perf_counter() - start_
+            del tree
+
+            start_  = time.perf_counter()
+            compact = Tree.load(path, frozen = True)
+            mmap_s  = time.perf_counter() - start_
+            compact.lca(a, b)
+            query_s = time.perf_counter() - start_
+            del compact
+
+            start_ = time.perf_counter()
+            Tree.load(path)
+            load_s = time.perf_counter() - start_
+
+            results.append({"n": n,
+                            "file_mb": round(os.path.getsize(path)/2**20, 1),
+                            "save_s": round(save_s, 3),
+                            "mmap_load_s": round(mmap_s, 4),
+                            "mmap_first_batch_s": round(query_s, 4),
+                            "full_load_s": round(load_s, 3)})
+    return results
+
+def printResults(results):
+    # Print a simple fixed width table
+    header = list(results[0].keys())
+    print("".join(f"{column:>22}" for column in header))
+    for row in results:
+        print("".join(f"{row[column]:>22}" for column in header))
+
+
+# Main -------------------------------------------------------------------------
+def main():
+    parser = constructCommandLineArguments()
+    args   = parser.parse_args()
+
+    if args.structure == 'queue':
+        results = benchmarkQueue(args.max_exponent)
+
+    if args.structure == 'asyncqueue':
+        results = benchmarkAsyncQueue(args.max_exponent, args.producers, args.consumers)
+
+    if args.structure == 'sharedqueue':
+        results = benchmarkSharedQueue(args.max_exponent)
+
+    if args.structure == 'stack':
+        results = benchmarkStack(args.max_exponent)
+
+    if args.structure == 'tree':
+        results = benchmarkTree(args.max_exponent)
+
+    if args.structure == 'treefile':
+        results = benchmarkTreeFile(args.max_exponent)
+
+    printResults(results)
+
+
+if __name__ == '__main__':
+    main()
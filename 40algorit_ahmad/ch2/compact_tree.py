@@ -0,0 +1,445 @@
+'''
+Frozen, array-backed form of a Tree for large hierarchies.
+Author: Nat Hawkins
+Date (YYYY-MM-DD): 2026-10-18
+'''
+
+# Imports ----------------------------------------------------------------------
+import json
+import mmap
+import numpy as np
+
+# File format ------------------------------------------------------------------
+# Magic bytes, uint32 version, uint32 header length, JSON header describing
+# each section (dtype, shape, offset), then the raw section arrays, each aligned
+# to _ALIGNMENT bytes so they can be viewed in place from a memory map.
+# Version 2 adds the optional values_mask section for trees where only some
+# nodes have values
+_MAGIC     = b'WATSONTR'
+_VERSION   = 2
+_ALIGNMENT = 64
+_SECTIONS  = {'labels': 'labels', 'values': 'values', 'parent': 'parent', 'depth': 'depth',
+              'subtree_size': 'subtree_size', 'child_offsets': 'child_offsets', 'child_ids': 'child_ids',
+              'up': 'up', 'label_order': '_label_order', 'sorted_labels': '_sorted', 'edges': 'edges'}
+
+# Functions --------------------------------------------------------------------
+def _asArray(items):
+    '''
+    Convert to a NumPy array without letting NumPy coerce mixed types
+    (e.g. 1 and '1' would both become the string '1').
+    '''
+    if isinstance(items, np.ndarray):
+        return items
+
+    items = list(items)
+    if not items:
+        # Nothing to coerce, and an object array could not be saved
+        return np.array([], dtype = np.int64)
+    kinds = set(map(type, items))
+    if kinds and (kinds <= {int} or kinds <= {int, float} or kinds <= {str}):
+        return np.asarray(items)
+    return np.array(items, dtype = object)
+
+# Classes ----------------------------------------------------------------------
+class CompactTree:
+    """
+    Immutable tree (or forest) stored as NumPy arrays instead of Node objects.
+
+    Nodes are renumbered 0..n-1 in pre-order, so every subtree occupies the
+    contiguous id range [v, v + subtree_size[v]) of the Euler tour. Ancestor
+    tests and subtree sizes are then O(1) array reads, and lowest common
+    ancestors and k-th ancestors use binary lifting tables in O(log depth).
+
+    Every query accepts a single label or a sequence of labels and answers
+    the whole batch with vectorized array operations. Where a query has no
+    answer (the parent of a root, the LCA of nodes in different trees) the
+    result is None.
+
+    Attributes
+    ----------
+    labels : numpy.ndarray
+        Node labels in pre-order
+    values : numpy.ndarray
+        Node values in pre-order
+    parent : numpy.ndarray
+        Pre-order id of each node's parent, -1 for roots
+    depth : numpy.ndarray
+        Number of edges between each node and its root
+    subtree_size : numpy.ndarray
+        Number of nodes in the subtree rooted at each node, itself included
+    child_offsets, child_ids : numpy.ndarray
+        CSR children lists: the children of node v are
+        child_ids[child_offsets[v]:child_offsets[v+1]]
+    up : numpy.ndarray
+        Binary lifting table, up[k][v] is the 2^k-th ancestor of v
+        (roots are their own ancestors)
+    edges : numpy.ndarray
+        Edges of the source Tree as (parent id, child id) rows, in the
+        order they were connected. None if not built from a Tree
+
+    Methods
+    -------
+    fromTree(tree):
+        Build a CompactTree from a Tree
+    save(path):
+        Write to a versioned binary file
+    load(path):
+        Memory map a file written by save()
+    ids(labels):
+        Pre-order ids of labels
+    getParent(labels):
+        Parent labels
+    getChildren(label):
+        Child labels of a single node
+    getDepth(labels):
+        Depths
+    getSubtreeSize(labels):
+        Subtree sizes
+    isAncestor(ancestors, descendants):
+        True where ancestors[i] is an ancestor of (or equal to) descendants[i]
+    getAncestor(labels, k):
+        k-th ancestor labels
+    lca(a, b):
+        Lowest common ancestor labels of a[i] and b[i]
+
+    Doctests
+    --------
+    >>> compact = CompactTree(["A", "B", "E", "C", "D"], [-1, 0, 1, 0, 0])
+    >>> compact.getSubtreeSize(["A", "B", "C"]).tolist()
+    [5, 2, 1]
+    >>> compact.lca(["E", "E", "C"], ["D", "B", "D"]).tolist()
+    ['A', 'B', 'A']
+    >>> compact.getAncestor("E", 2), compact.getParent("A")
+    ('A', None)
+    >>> compact.isAncestor(["A", "B"], ["E", "D"]).tolist()
+    [True, False]
+    >>> CompactTree(["A", "B", "C", "D"], [-1, 0, 0, 1])
+    Traceback (most recent call last):
+        ...
+    ValueError: Nodes must be numbered in pre-order, node 2 does not follow the previous subtree of its parent 0.
+    """
+    def __init__(self, labels, parent, values = None):
+        '''
+        Build from pre-order numbered arrays. Use CompactTree.fromTree()
+        to convert a Tree.
+
+        Parameters
+        ----------
+        - labels (Iterable): Unique node labels, in pre-order.
+        - parent (Iterable): Pre-order id of each node's parent, -1 for roots.
+          Every subtree must occupy a contiguous range of ids, children in id order.
+        - values (Iterable): Optional. Node values, in pre-order.
+        '''
+        self.labels = _asArray(labels)
+        self.parent = np.asarray(parent, dtype = np.int64)
+        self.edges  = None
+        n = len(self.parent)
+
+        if len(self.labels) != n:
+            raise ValueError(f"Length of labels and parent do not match. {len(self.labels)} != {n}.")
+        if np.any(self.parent >= np.arange(n)):
+            raise ValueError("Nodes must be numbered in pre-order (parent[v] < v).")
+
+        self.values = _asArray(values) if values is not None else np.full(n, None, dtype = object)
+        self._buildLookup()
+
+        # Depth and subtree size. Parents precede children in pre-order, so one
+        # forward and one backward sweep suffice
+        parent = self.parent.tolist()
+        depth  = [0]*n
+        size   = [1]*n
+        for v in range(n):
+            if parent[v] >= 0:
+                depth[v] = depth[parent[v]] + 1
+        for v in range(n - 1, -1, -1):
+            if parent[v] >= 0:
+                size[parent[v]] += size[v]
+
+        # parent[v] < v alone does not make the numbering pre-order (D could
+        # hang under B in A, B, C, D). In pre-order a node's first child is
+        # the next id and each later child, like each later root, starts
+        # right where the previous one's subtree ends
+        next_child = list(range(1, n + 1))
+        next_root  = 0
+        for v in range(n):
+            p = parent[v]
+            if p < 0:
+                if v != next_root:
+                    raise ValueError(f"Nodes must be numbered in pre-order, root {v} does not follow the previous tree.")
+                next_root = v + size[v]
+            else:
+                if v != next_child[p]:
+                    raise ValueError(f"Nodes must be numbered in pre-order, node {v} does not follow the previous subtree of its parent {p}.")
+                next_child[p] = v + size[v]
+        self.depth        = np.array(depth, dtype = np.int64)
+        self.subtree_size = np.array(size, dtype = np.int64)
+
+        # CSR children: sorting non-roots by parent keeps siblings in pre-order
+        is_child           = self.parent >= 0
+        self.child_ids     = np.flatnonzero(is_child)[np.argsort(self.parent[is_child], kind = 'stable')]
+        self.child_offsets = np.zeros(n + 1, dtype = np.int64)
+        np.cumsum(np.bincount(self.parent[is_child], minlength = n), out = self.child_offsets[1:])
+
+        # Binary lifting, only as many levels as the deepest node needs
+        levels  = max(1, int(self.depth.max(initial = 0)).bit_length())
+        self.up = np.empty((levels, n), dtype = np.int64)
+        self.up[0] = np.where(is_child, self.parent, np.arange(n))
+        for k in range(1, levels):
+            self.up[k] = self.up[k - 1][self.up[k - 1]]
+
+        self._buildRoots()
+
+    @classmethod
+    def fromTree(cls, tree):
+        '''
+        Freeze a Tree into a CompactTree.
+
+        Parameters
+        ----------
+        - tree (Tree): Tree to convert. Later changes to the Tree are not reflected.
+
+        Returns
+        -------
+        CompactTree: Array-backed copy of tree.
+        '''
+        order  = list(tree.preorder())
+        ids    = {node.label: i for i, node in enumerate(order)}
+        parent = [ids[node.parent.label] if node.parent is not None else -1 for node in order]
+
+        compact = cls([node.label for node in order], parent, [node.val for node in order])
+
+        # Keep the Tree's edge order (and so its child order) as pre-order id pairs
+        compact.edges = np.array([(ids[parent_label], ids[child_label]) for parent_label, child_label in tree.getEdges()],
+                                 dtype = np.int64).reshape(-1, 2)
+        return compact
+
+    def save(self, path):
+        '''
+        Write the tree to path in a versioned binary format that load() can
+        memory map.
+
+        Parameters
+        ----------
+        - path (str): Output file path.
+
+        Raises
+        ------
+        TypeError: Labels or values (other than None) are not all numbers or all strings
+
+        Doctests
+        --------
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), "tree.bin")
+        >>> CompactTree(["A", "B", "C"], [-1, 0, 0], [1.5, None, 3]).save(path)
+        >>> CompactTree.load(path).values.tolist()
+        [1.5, None, 3.0]
+        >>> CompactTree([], []).save(path)
+        >>> len(CompactTree.load(path))
+        0
+        '''
+        sections = {name: getattr(self, attribute) for name, attribute in _SECTIONS.items()}
+
+        # Values that were never set and edges that were never recorded are
+        # left out. When only some nodes have values, the missing ones are
+        # stored as zeros next to a mask of the nodes that have one
+        if self.values.dtype == object:
+            present = np.array([value is not None for value in self.values.tolist()], dtype = bool)
+            if not present.any():
+                del sections['values']
+            elif not present.all():
+                stored = _asArray(self.values[present].tolist())
+                if stored.dtype != object:
+                    sections['values'] = np.zeros(len(self), dtype = stored.dtype)
+                    sections['values'][present] = stored
+                    sections['values_mask'] = present
+        if self.edges is None:
+            del sections['edges']
+
+        for name in ('labels', 'values'):
+            if name in sections and sections[name].dtype == object:
+                raise TypeError(f"Cannot save {name} of mixed or non-numeric type, expecting all numbers or all strings.")
+
+        # Lay out the sections, then write the header and data
+        header, offset = {"version": _VERSION, "n": len(self), "sections": {}}, 0
+        for name, array in sections.items():
+            header["sections"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = -(-(offset + array.nbytes)//_ALIGNMENT)*_ALIGNMENT
+
+        encoded = json.dumps(header).encode('utf-8')
+        start   = -(-(len(_MAGIC) + 8 + len(encoded))//_ALIGNMENT)*_ALIGNMENT
+        with open(path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(np.array([_VERSION, len(encoded)], dtype = '<u4').tobytes())
+            f.write(encoded)
+            for name, array in sections.items():
+                f.write(bytes(start + header["sections"][name]["offset"] - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Memory map a file written by save(). The arrays are read-only views
+        of the file, so loading does no per-node work and every process that
+        loads the same file shares its pages.
+
+        Parameters
+        ----------
+        - path (str): File written by CompactTree.save() or Tree.save().
+
+        Returns
+        -------
+        CompactTree: Read-only tree backed by the file. If only some nodes
+        had values, values is an in-memory object array with None for the rest.
+
+        Raises
+        ------
+        ValueError: File is not a tree file, or was written by a newer version
+        '''
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
+        if buffer[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a tree file.")
+        version, header_length = np.frombuffer(buffer, dtype = '<u4', count = 2, offset = len(_MAGIC)).tolist()
+        if version > _VERSION:
+            raise ValueError(f"{path} uses tree file version {version}, this reader supports up to {_VERSION}.")
+
+        header = json.loads(bytes(buffer[len(_MAGIC) + 8:len(_MAGIC) + 8 + header_length]))
+        start  = -(-(len(_MAGIC) + 8 + header_length)//_ALIGNMENT)*_ALIGNMENT
+
+        compact        = cls.__new__(cls)
+        compact.values = np.full(header["n"], None, dtype = object)
+        compact.edges  = None
+        compact.index  = None
+        mask           = None
+        for name, section in header["sections"].items():
+            count = int(np.prod(section["shape"]))
+            array = np.frombuffer(buffer, dtype = np.dtype(section["dtype"]), count = count, offset = start + section["offset"])
+            if name == 'values_mask':
+                mask = array
+            else:
+                setattr(compact, _SECTIONS[name], array.reshape(section["shape"]))
+
+        # Missing values go back to None
+        if mask is not None:
+            compact.values = compact.values.astype(object)
+            compact.values[~mask] = None
+
+        compact._buildRoots()
+        return compact
+
+    def __len__(self):
+        return len(self.parent)
+
+    def ids(self, labels):
+        scalar = self._isScalar(labels)
+
+        # Mixed type labels fall back to a dict
+        if self.index is not None:
+            if scalar:
+                return self.index[labels]
+            return np.fromiter((self.index[label] for label in labels), dtype = np.int64, count = len(labels))
+
+        # Otherwise binary search the sorted labels for the whole batch at once
+        query    = np.atleast_1d(np.asarray(labels))
+        position = np.minimum(np.searchsorted(self._sorted, query), len(self._sorted) - 1)
+        missing  = self._sorted[position] != query
+        if np.any(missing):
+            raise KeyError(query[missing][0].item())
+
+        ids = self._label_order[position]
+        return int(ids[0]) if scalar else ids
+
+    def getParent(self, labels):
+        ids = self.ids(labels)
+        return self._toLabels(self.parent[ids], ids)
+
+    def getChildren(self, label):
+        v = self.ids(label)
+        return self.labels[self.child_ids[self.child_offsets[v]:self.child_offsets[v + 1]]]
+
+    def getDepth(self, labels):
+        return self.depth[self.ids(labels)]
+
+    def getSubtreeSize(self, labels):
+        return self.subtree_size[self.ids(labels)]
+
+    def isAncestor(self, ancestors, descendants):
+        # Pre-order interval containment
+        u = self.ids(ancestors)
+        v = self.ids(descendants)
+        return (u <= v) & (v < u + self.subtree_size[u])
+
+    def getAncestor(self, labels, k = 1):
+        ids = self.ids(labels)
+        v   = np.atleast_1d(ids).copy()
+        k   = np.broadcast_to(np.asarray(k, dtype = np.int64), v.shape)
+
+        # Jump by each set bit of k, k beyond the root has no answer
+        for level in range(len(self.up)):
+            jump    = ((k >> level) & 1).astype(bool)
+            v[jump] = self.up[level][v[jump]]
+        v[k > self.depth[np.atleast_1d(ids)]] = -1
+
+        return self._toLabels(v, ids)
+
+    def lca(self, a, b):
+        u_ids = self.ids(a)
+        u     = np.atleast_1d(u_ids).copy()
+        v     = np.atleast_1d(self.ids(b)).copy()
+
+        # Make u the deeper node, then lift it to v's depth
+        swap             = self.depth[u] < self.depth[v]
+        u[swap], v[swap] = v[swap], u[swap]
+        diff = self.depth[u] - self.depth[v]
+        for level in range(len(self.up)):
+            jump    = ((diff >> level) & 1).astype(bool)
+            u[jump] = self.up[level][u[jump]]
+
+        # Lift both while their ancestors differ, they end just below the LCA
+        for level in range(len(self.up) - 1, -1, -1):
+            differ    = self.up[level][u] != self.up[level][v]
+            u[differ] = self.up[level][u[differ]]
+            v[differ] = self.up[level][v[differ]]
+
+        result = np.where(u == v, u, self.up[0][u])
+        result[self._root[u] != self._root[v]] = -1
+
+        return self._toLabels(result, u_ids)
+
+    def _buildLookup(self):
+        # Sorted labels for vectorized lookups, or a dict if labels cannot be sorted
+        if self.labels.dtype == object:
+            self._label_order = None
+            self._sorted      = None
+            self.index        = {label: i for i, label in enumerate(self.labels.tolist())}
+            unique            = len(self.index)
+        else:
+            self._label_order = np.argsort(self.labels, kind = 'stable')
+            self._sorted      = self.labels[self._label_order]
+            self.index        = None
+            unique            = len(self._sorted) - int(np.count_nonzero(self._sorted[1:] == self._sorted[:-1]))
+
+        if unique != len(self.labels):
+            raise ValueError("Node labels must be unique.")
+
+    def _buildRoots(self):
+        # Root of the tree each node belongs to (trees are contiguous in pre-order)
+        n          = len(self.parent)
+        self._root = np.maximum.accumulate(np.where(self.parent >= 0, 0, np.arange(n)))
+
+    def _isScalar(self, labels):
+        return np.ndim(labels) == 0
+
+    def _toLabels(self, ids, like):
+        # Map ids back to labels, -1 becomes None. Scalar in, scalar out
+        ids = np.atleast_1d(ids)
+        if np.any(ids < 0):
+            result = self.labels[ids].astype(object)
+            result[ids < 0] = None
+        else:
+            result = self.labels[ids]
+
+        if np.ndim(like) == 0:
+            return result[0].item() if isinstance(result[0], np.generic) else result[0]
+        return result
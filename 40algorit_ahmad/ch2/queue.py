@@ -1,39 +1,233 @@
+from collections import deque
+import asyncio
+
+
+class Empty(Exception):
+    """
+    Raised when a non-blocking dequeue is attempted on an empty AsyncQueue.
+    """
+    pass
+
+
+class Full(Exception):
+    """
+    Raised when an item is added to a bounded Queue that is already at capacity.
+    """
+    pass
+
+
 class Queue:
     """
     A basic class to represent a Queue. Abides by FIFO protocol.
 
+    Items are stored in a ring buffer (collections.deque) so both ends of
+    the queue can be reached in O(1) time, regardless of how many items
+    are waiting.
+
     Attributes
     ----------
-    queue : list
-        Queue stored as a list object
+    queue : collections.deque
+        Queue stored as a deque object. Oldest item on the left
+    capacity : int
+        Optional. Maximum number of items the queue can hold.
+        None for an unbounded queue
 
     Methods
     -------
     isEmpty():
         Return True if queue is empty.
+    isFull():
+        Return True if a bounded queue is at capacity.
     enqueue(item):
         Add item to the queue
+    enqueue_many(items):
+        Add every item of an iterable to the queue, in order
     dequeue():
         Returns next item in the queue
+    dequeue_many(n):
+        Returns a list of up to n next items in the queue
     size():
         Returns the size of the queue
+
+    Doctests
+    --------
+    >>> queue = Queue(capacity = 3)
+    >>> queue.enqueue_many(['Yellow', 'Red'])
+    >>> queue.enqueue('Orange')
+    >>> queue.isFull()
+    True
+    >>> queue.dequeue_many(2)
+    ['Yellow', 'Red']
+    >>> queue.dequeue(), queue.dequeue()
+    ('Orange', None)
     """
-    def __init__(self):
-        self.queue = []
+    def __init__(self, capacity = None):
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"Capacity must be a positive integer, received {capacity}.")
+
+        self.queue    = deque()
+        self.capacity = capacity
 
     def isEmpty(self):
         return len(self.queue) == 0
-    
+
+    def isFull(self):
+        return self.capacity is not None and len(self.queue) >= self.capacity
+
     def enqueue(self, item):
-        self.queue.insert(0, item)
+        if self.isFull():
+            raise Full(f"Queue is at capacity ({self.capacity}).")
+        self.queue.append(item)
+
+    def enqueue_many(self, items):
+        # Bounded queues either take the whole batch or none of it
+        if self.capacity is not None:
+            items = list(items)
+            if len(self.queue) + len(items) > self.capacity:
+                raise Full(f"Cannot add {len(items)} items to queue of size {len(self.queue)} with capacity {self.capacity}.")
+        self.queue.extend(items)
 
     def dequeue(self):
         if self.isEmpty(): return None
-        return self.queue.pop()
-    
+        return self.queue.popleft()
+
+    def dequeue_many(self, n):
+        # Never returns more than is waiting in the queue
+        popleft = self.queue.popleft
+        return [popleft() for _ in range(min(n, len(self.queue)))]
+
     def size(self):
         return len(self.queue)
-    
+
+
+class AsyncQueue:
+    """
+    A Queue for asyncio producer/consumer pipelines. Abides by FIFO protocol.
+
+    Consumers wait on an empty queue and producers wait on a full one
+    without polling isEmpty(), so a bounded AsyncQueue applies
+    backpressure to fast producers.
+
+    Attributes
+    ----------
+    queue : Queue
+        Underlying (optionally bounded) Queue holding the items
+    capacity : int
+        Optional. Maximum number of items before enqueue() waits.
+        None for an unbounded queue
+
+    Methods
+    -------
+    isEmpty():
+        Return True if queue is empty.
+    isFull():
+        Return True if a bounded queue is at capacity.
+    enqueue(item):
+        Coroutine. Add item to the queue, waiting for space if full
+    enqueue_nowait(item):
+        Add item to the queue, raise Full if there is no space
+    dequeue():
+        Coroutine. Return next item in the queue, waiting if empty
+    dequeue_nowait():
+        Return next item in the queue, raise Empty if there is none
+    dequeue_many(n, timeout):
+        Coroutine. Wait up to timeout seconds for an item, then return
+        a list of up to n items
+    size():
+        Returns the size of the queue
+
+    Doctests
+    --------
+    >>> async def pipeline():
+    ...     queue = AsyncQueue(capacity = 2)
+    ...     await queue.enqueue('Yellow')
+    ...     await queue.enqueue('Red')
+    ...     first = await queue.dequeue()
+    ...     rest  = await queue.dequeue_many(5, timeout = 0.01)
+    ...     empty = await queue.dequeue_many(5, timeout = 0.01)
+    ...     return first, rest, empty
+    >>> asyncio.run(pipeline())
+    ('Yellow', ['Red'], [])
+    """
+    def __init__(self, capacity = None):
+        self.queue    = Queue(capacity = capacity)
+        self.capacity = capacity
+
+        # Futures of coroutines waiting for an item (getters) or for
+        # space (putters), woken in FIFO order
+        self._getters = deque()
+        self._putters = deque()
+
+    def isEmpty(self):
+        return self.queue.isEmpty()
+
+    def isFull(self):
+        return self.queue.isFull()
+
+    async def enqueue(self, item):
+        await self._wait(self._putters, self.queue.isFull)
+        self.enqueue_nowait(item)
+
+    def enqueue_nowait(self, item):
+        # Raises Full from the underlying queue if at capacity
+        self.queue.enqueue(item)
+        self._wakeNext(self._getters)
+
+    async def dequeue(self):
+        await self._wait(self._getters, self.queue.isEmpty)
+        return self.dequeue_nowait()
+
+    def dequeue_nowait(self):
+        if self.queue.isEmpty():
+            raise Empty("Queue is empty.")
+        item = self.queue.dequeue()
+        self._wakeNext(self._putters)
+        return item
+
+    async def dequeue_many(self, n, timeout = None):
+        try:
+            await asyncio.wait_for(self._wait(self._getters, self.queue.isEmpty), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        items = self.queue.dequeue_many(n)
+
+        # One freed slot per item taken, and pass on any leftovers
+        for _ in items:
+            self._wakeNext(self._putters)
+        if not self.queue.isEmpty():
+            self._wakeNext(self._getters)
+        return items
+
+    def size(self):
+        return self.queue.size()
+
+    async def _wait(self, waiters, blocked):
+        # Park on a future until woken, re-checking the condition since
+        # another coroutine may have claimed the item/slot first
+        while blocked():
+            waiter = asyncio.get_running_loop().create_future()
+            waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                try:
+                    waiters.remove(waiter)
+                except ValueError:
+                    pass
+                # Hand a wakeup we received but can no longer use to the next waiter
+                if not blocked() and not waiter.cancelled():
+                    self._wakeNext(waiters)
+                raise
+
+    def _wakeNext(self, waiters):
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
 if __name__ == '__main__':
     queue = Queue()
     queue.enqueue('Yellow')
@@ -45,4 +239,4 @@ if __name__ == '__main__':
     print(queue.dequeue())
     print(queue.dequeue())
     print(queue.dequeue())
-    print(queue.dequeue())
\ No newline at end of file
+    print(queue.dequeue())
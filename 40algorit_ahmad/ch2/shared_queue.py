@@ -0,0 +1,216 @@
+'''
+Multi-process Queue backed by a fixed-slot ring buffer in shared memory.
+Author: Nat Hawkins
+Date (YYYY-MM-DD): 2026-10-18
+'''
+
+# Imports ----------------------------------------------------------------------
+from multiprocessing import Lock, Process
+from multiprocessing.shared_memory import SharedMemory
+import struct
+
+# Note: run from this directory so `queue` resolves to ch2/queue.py
+from queue import Full
+
+# Classes ----------------------------------------------------------------------
+class SharedQueue:
+    """
+    A Queue whose items live in multiprocessing.shared_memory so several
+    processes can enqueue and dequeue without pickling. Abides by FIFO protocol.
+
+    Every item is a fixed-width numeric record described by a struct format
+    string (e.g. 'q' for one int64, 'qd' for an int64 and a float64). Records
+    are packed directly into their slot of the ring buffer and unpacked
+    directly out of it.
+
+    Shared memory layout: two uint64 counters (items dequeued, items enqueued)
+    followed by capacity record slots. Enqueuing only ever writes the
+    enqueued counter and dequeuing only the dequeued counter, so a single
+    producer and a single consumer never overwrite each other's progress,
+    even without a common lock. Several producers or several consumers
+    must share one lock: pass the same multiprocessing.Lock to every
+    SharedQueue, including ones attached by name, or send the queue
+    itself to the other processes, which carries its lock along.
+
+    Attributes
+    ----------
+    name : str
+        Name of the shared memory block. Pass to SharedQueue(..., name = name)
+        to attach to an existing queue from another process. Without the
+        creator's lock, the attached side must be the only producer or the
+        only consumer
+    record_format : str
+        struct format string for a single record
+    capacity : int
+        Number of record slots in the ring buffer
+
+    Methods
+    -------
+    isEmpty():
+        Return True if queue is empty.
+    isFull():
+        Return True if queue is at capacity.
+    enqueue(item):
+        Add a record to the queue. Raises Full if at capacity
+    enqueue_many(items):
+        Add every record of an iterable to the queue, in order
+    dequeue():
+        Returns next record in the queue, None if empty
+    dequeue_many(n):
+        Returns a list of up to n next records in the queue
+    size():
+        Returns the size of the queue
+    close():
+        Detach this process from the shared memory block
+    unlink():
+        Free the shared memory block. Call once, from the creating process
+
+    Doctests
+    --------
+    >>> queue = SharedQueue('qd', capacity = 4)
+    >>> queue.enqueue((1, 0.5))
+    >>> queue.enqueue_many([(2, 1.5), (3, 2.5)])
+    >>> queue.dequeue(), queue.size()
+    ((1, 0.5), 2)
+    >>> queue.dequeue_many(-1), queue.size()
+    ([], 2)
+    >>> queue.dequeue_many(5)
+    [(2, 1.5), (3, 2.5)]
+    >>> queue.dequeue() is None
+    True
+    >>> queue.close(); queue.unlink()
+    """
+    _header  = struct.Struct('QQ')
+    _counter = struct.Struct('Q')
+
+    # Byte offsets of the dequeued (head) and enqueued (tail) counters
+    _HEAD = 0
+    _TAIL = 8
+
+    def __init__(self, record_format, capacity, name = None, lock = None):
+        '''
+        Create a new shared queue, or attach to an existing one by name.
+
+        Parameters
+        ----------
+        - record_format (str): struct format string of a single record.
+        - capacity (int): Number of record slots.
+        - name (str): Optional. Name of an existing queue to attach to.
+        - lock (multiprocessing.Lock): Optional. Lock shared by every process using the queue.
+          Required when attaching by name with more than one producer or consumer.
+        '''
+        if capacity < 1:
+            raise ValueError(f"Capacity must be a positive integer, received {capacity}.")
+
+        self.record_format = record_format
+        self.capacity      = capacity
+        self._record       = struct.Struct(record_format)
+        self._scalar       = len(self._record.unpack(bytes(self._record.size))) == 1
+        self._lock         = lock if lock is not None else Lock()
+
+        size = self._header.size + capacity*self._record.size
+        if name is None:
+            self._shm = SharedMemory(create = True, size = size)
+            self._header.pack_into(self._shm.buf, 0, 0, 0)
+        else:
+            self._shm = SharedMemory(name = name)
+        self.name = self._shm.name
+
+    def __getstate__(self):
+        # Only the shared memory name travels to the child process, the
+        # ring buffer itself is never copied
+        return (self.record_format, self.capacity, self.name, self._lock)
+
+    def __setstate__(self, state):
+        record_format, capacity, name, lock = state
+        self.__init__(record_format, capacity, name = name, lock = lock)
+
+    def isEmpty(self):
+        return self.size() == 0
+
+    def isFull(self):
+        return self.size() >= self.capacity
+
+    def enqueue(self, item):
+        with self._lock:
+            head, tail = self._header.unpack_from(self._shm.buf, 0)
+            if tail - head >= self.capacity:
+                raise Full(f"Queue is at capacity ({self.capacity}).")
+            self._write(tail, item)
+            self._counter.pack_into(self._shm.buf, self._TAIL, tail + 1)
+
+    def enqueue_many(self, items):
+        # All or nothing, like a bounded Queue
+        items = list(items)
+        with self._lock:
+            head, tail = self._header.unpack_from(self._shm.buf, 0)
+            if tail - head + len(items) > self.capacity:
+                raise Full(f"Cannot add {len(items)} items to queue of size {tail - head} with capacity {self.capacity}.")
+            for item in items:
+                self._write(tail, item)
+                tail += 1
+            self._counter.pack_into(self._shm.buf, self._TAIL, tail)
+
+    def dequeue(self):
+        with self._lock:
+            head, tail = self._header.unpack_from(self._shm.buf, 0)
+            if head == tail: return None
+            item = self._read(head)
+            self._counter.pack_into(self._shm.buf, self._HEAD, head + 1)
+        return item
+
+    def dequeue_many(self, n):
+        with self._lock:
+            head, tail = self._header.unpack_from(self._shm.buf, 0)
+            count = max(0, min(n, tail - head))
+            items = [self._read(head + i) for i in range(count)]
+            self._counter.pack_into(self._shm.buf, self._HEAD, head + count)
+        return items
+
+    def size(self):
+        head, tail = self._header.unpack_from(self._shm.buf, 0)
+        return tail - head
+
+    def close(self):
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+    def _offset(self, counter):
+        return self._header.size + (counter % self.capacity)*self._record.size
+
+    def _write(self, counter, item):
+        if self._scalar:
+            self._record.pack_into(self._shm.buf, self._offset(counter), item)
+        else:
+            self._record.pack_into(self._shm.buf, self._offset(counter), *item)
+
+    def _read(self, counter):
+        record = self._record.unpack_from(self._shm.buf, self._offset(counter))
+        return record[0] if self._scalar else record
+
+
+# Main -------------------------------------------------------------------------
+def _produce(queue, n):
+    for i in range(n):
+        while queue.isFull():
+            pass
+        queue.enqueue((i, i/2))
+    queue.close()
+
+if __name__ == '__main__':
+    queue    = SharedQueue('qd', capacity = 8)
+    producer = Process(target = _produce, args = (queue, 5))
+    producer.start()
+
+    received = 0
+    while received < 5:
+        item = queue.dequeue()
+        if item is not None:
+            print(item)
+            received += 1
+
+    producer.join()
+    queue.close()
+    queue.unlink()
@@ -1,46 +1,97 @@
+from array import array
+
+
 class Stack:
     """
-    A class object to represent a Stack. Abides by 
+    A class object to represent a Stack. Abides by
     LIFO/FILO.
 
+    By default items are stored in a list. Passing an array
+    typecode (e.g. 'q' for int64, 'd' for float64) stores the
+    items unboxed in an array.array instead, which is far
+    smaller for numeric workloads.
+
     Attributes
     ----------
-    stack : list
-        Values of the Stack stored as a list
-    
+    stack : list or array.array
+        Values of the Stack stored as a list, or an array
+        of typecode if given
+    typecode : str
+        Optional. array.array typecode of a typed stack
+
     Methods
     -------
     isEmpty():
         Checks to see if the stack is empty
     push(item):
         Push item onto the stack
+    push_many(items):
+        Push every item of an iterable onto the stack, in order
     peek(item):
         See the element that would be returned if the pop()
         method is called
     pop():
         Returns the next element in the stack
+    pop_many(n):
+        Returns the next n (or fewer) elements in the order
+        pop() would return them. A typed stack returns an array
+    snapshot():
+        Zero-copy memoryview of a typed stack, bottom first.
+        The stack cannot grow or shrink until the view is released
     size():
         Return the size of the stack
+
+    Doctests
+    --------
+    >>> stack = Stack(typecode = 'q')
+    >>> stack.push_many([1, 2, 3])
+    >>> stack.push(4)
+    >>> with stack.snapshot() as view:
+    ...     view.tolist()
+    [1, 2, 3, 4]
+    >>> stack.pop_many(3)
+    array('q', [4, 3, 2])
+    >>> stack.pop(), stack.pop()
+    (1, None)
     """
-    def __init__(self):
-        self.stack    = []
+    def __init__(self, typecode = None):
+        self.typecode = typecode
+        self.stack    = [] if typecode is None else array(typecode)
 
     def isEmpty(self):
         return len(self.stack) == 0
-    
+
     def push(self, item):
         self.stack.append(item)
 
+    def push_many(self, items):
+        self.stack.extend(items)
+
     def peek(self):
         return self.stack[-1]
 
     def pop(self):
         if self.isEmpty(): return None
         return self.stack.pop()
-    
+
+    def pop_many(self, n):
+        n = min(n, len(self.stack))
+        if n <= 0: return self.stack[:0]
+
+        # Slice the top off in one step rather than n pops
+        items = self.stack[-n:]
+        del self.stack[-n:]
+        items.reverse()
+        return items
+
+    def snapshot(self):
+        if self.typecode is None:
+            raise TypeError("snapshot() requires a typed stack, create one with Stack(typecode = ...).")
+        return memoryview(self.stack)
+
     def size(self):
         return len(self.stack)
-    
+
 if __name__ == '__main__':
     stack = Stack()
     stack.push('Yellow')
@@ -52,4 +103,4 @@ if __name__ == '__main__':
     print(stack.pop())
     print(stack.pop())
     print(stack.pop())
-    print(stack.pop())
\ No newline at end of file
+    print(stack.pop())
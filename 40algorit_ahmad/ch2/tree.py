@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node:
     """
     A class used to a Node in a tree
@@ -12,8 +15,10 @@ class Node:
         Optional. Data to associate to the Node
     parent : Node
         Parent of current Node
-    child : Node
-        Child of current Node
+    children : list
+        Child Nodes of current Node, in the order they were added
+    tree : Tree
+        Tree the Node was added to, None if it is not in one
 
     Methods
     -------
@@ -24,34 +29,43 @@ class Node:
     getLabel():
         Get label of current Node
     setLabel(label):
-        Set label of current Node
+        Set label of current Node. Nodes added to a Tree are renamed
+        through Tree.renameNode() so the Tree can still find them
     getParent():
         Get Parent Node of current Node
     setParent(Node):
         Set Parent Node of current Node
     getChild():
-        Get Child Node of current Node
+        Get Child Node of current Node. None if there are no
+        Child Nodes, a list of Nodes if there are several
+    getChildren():
+        Get list of Child Nodes of current Node
     setChild(Node):
-        Set Child Node of current Node. 
-        If multiple Child Nodes, multiple Nodes stored as a list object
+        Add a Child Node to current Node.
     """
+    __slots__ = ('label', 'val', 'parent', 'children', 'tree')
+
     def __init__(self, label, val = None):
-        self.label  = label
-        self.val    = val
-        self.parent = None
-        self.child  = None
+        self.label    = label
+        self.val      = val
+        self.parent   = None
+        self.children = []
+        self.tree     = None
 
     def getValue(self):
         return self.val
-    
+
     def setValue(self, val):
         self.val = val
 
     def getLabel(self):
         return self.label
-    
+
     def setLabel(self, label):
-        self.label = label
+        if self.tree is not None:
+            self.tree.renameNode(self.label, label)
+        else:
+            self.label = label
 
     def getParent(self):
         return self.parent
@@ -60,13 +74,15 @@ class Node:
         self.parent = node
 
     def getChild(self):
-        return self.child
-    
+        if len(self.children) == 0: return None
+        if len(self.children) == 1: return self.children[0]
+        return list(self.children)
+
+    def getChildren(self):
+        return self.children
+
     def setChild(self, node):
-        if self.child is None:
-            self.child = node
-        else:
-            self.child = [self.child, node]
+        self.children.append(node)
 
     def __repr__(self):
         return f"Node: {self.label}{f' ({self.val})' if self.val is not None else ''}"
@@ -76,12 +92,17 @@ class Tree:
     """
     A class to represent a Tree data structure.
 
+    Nodes are indexed by label, so looking up or connecting
+    Nodes takes O(1) time and building an n-node tree O(n).
+
     Attributes
     ----------
     nodes : list
         List of Node objects
     edges : list
         List of edges between Node objects
+    index : dict
+        Node objects keyed by label
 
     Methods
     -------
@@ -92,28 +113,91 @@ class Tree:
         tracked using Node labels
     getNode(label)
         Get specific Node based on label
+    getRoots():
+        Get list of Node objects without a parent
     addNode(label, val):
         Add Node to list of Node objects using label.
         Optional, add value to Node using val
+    renameNode(label, new_label):
+        Change the label of a Node, updating the index and edges
     connectNode(parent: Node, child: Node):
         Set parent Parent Node as parent to Child Node
         using Node.setParent() and Node.setChild() methods.
+    preorder(label):
+        Generator of Nodes, each Node before its children
+    postorder(label):
+        Generator of Nodes, each Node after its children
+    levelorder(label):
+        Generator of Nodes, breadth first
+    freeze():
+        Convert to an immutable, array-backed CompactTree
+    save(path):
+        Write the tree to a binary file
+    load(path, frozen):
+        Read a tree written by save(). Nodes are added in pre-order.
+        With frozen = True, return a memory mapped CompactTree instead
+
+    Traversals start at the Node with the given label, or walk
+    every root in insertion order if no label is given.
+
+    Doctests
+    --------
+    >>> tree = Tree()
+    >>> for label in "ABCDE":
+    ...     tree.addNode(label)
+    >>> for parent, child in [("A", "B"), ("A", "C"), ("A", "D"), ("B", "E")]:
+    ...     tree.connectNode(parent, child)
+    >>> tree.getNode("A").getChildren()
+    [Node: B, Node: C, Node: D]
+    >>> [node.label for node in tree.preorder()]
+    ['A', 'B', 'E', 'C', 'D']
+    >>> [node.label for node in tree.postorder()]
+    ['E', 'B', 'C', 'D', 'A']
+    >>> [node.label for node in tree.levelorder("A")]
+    ['A', 'B', 'C', 'D', 'E']
+    >>> tree.getNode("B").setLabel("Z")
+    >>> tree.getNode("Z").getChildren(), ("A", "Z") in tree.getEdges()
+    ([Node: E], True)
     """
     def __init__(self):
         self.nodes = []
         self.edges = []
+        self.index = {}
 
     def getNodes(self):
         return self.nodes
-    
+
     def getEdges(self):
         return self.edges
 
     def getNode(self, label):
-        return [node for node in self.nodes if node.getLabel() == label][0]
+        return self.index[label]
+
+    def getRoots(self):
+        return [node for node in self.nodes if node.parent is None]
 
     def addNode(self, label, val = None):
-        self.nodes.append(Node(label, val = val))
+        if label in self.index:
+            raise ValueError(f"Node labels must be unique, {label!r} is already in the tree.")
+
+        node = Node(label, val = val)
+        node.tree = self
+        self.nodes.append(node)
+        self.index[label] = node
+
+    def renameNode(self, label, new_label):
+        if new_label == label:
+            return
+        if new_label in self.index:
+            raise ValueError(f"Node labels must be unique, {new_label!r} is already in the tree.")
+
+        node = self.index.pop(label)
+        node.label = new_label
+        self.index[new_label] = node
+
+        # Edges are tracked by label
+        self.edges = [(new_label if parent == label else parent, new_label if child == label else child)
+                      for parent, child in self.edges]
 
     def connectNode(self, parent_label, child_label):
         parent = self.getNode(parent_label)
@@ -124,6 +208,67 @@ class Tree:
 
         self.edges.append((parent_label, child_label))
 
+    def preorder(self, label = None):
+        # Explicit stack, children pushed in reverse so the first child is visited first
+        stack = self._starts(label)[::-1]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def postorder(self, label = None):
+        # Each Node is yielded once the iterator over its children is exhausted
+        for start in self._starts(label):
+            stack = [(start, iter(start.children))]
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    yield node
+                else:
+                    stack.append((child, iter(child.children)))
+
+    def levelorder(self, label = None):
+        queue = deque(self._starts(label))
+        while queue:
+            node = queue.popleft()
+            yield node
+            queue.extend(node.children)
+
+    def freeze(self):
+        # Imported here so Tree itself does not depend on numpy
+        from compact_tree import CompactTree
+        return CompactTree.fromTree(self)
+
+    def save(self, path):
+        # Stored in the frozen layout so it can be memory mapped by load()
+        self.freeze().save(path)
+
+    @classmethod
+    def load(cls, path, frozen = False):
+        from compact_tree import CompactTree
+        compact = CompactTree.load(path)
+        if frozen:
+            return compact
+
+        tree   = cls()
+        labels = compact.labels.tolist()
+        for label, val in zip(labels, compact.values.tolist()):
+            tree.addNode(label, val = val)
+
+        # Connect in the original edge order so children keep their order
+        if compact.edges is not None:
+            edges = compact.edges.tolist()
+        else:
+            edges = [(parent, child) for child, parent in enumerate(compact.parent.tolist()) if parent >= 0]
+        for parent, child in edges:
+            tree.connectNode(labels[parent], labels[child])
+        return tree
+
+    def _starts(self, label):
+        return self.getRoots() if label is None else [self.getNode(label)]
+
 if __name__ == '__main__':
     tree = Tree()
 
@@ -146,4 +291,4 @@ if __name__ == '__main__':
     for node in tree.nodes:
         print(node)
         print(node.getParent())
-        print(node.getChild())
\ No newline at end of file
+        print(node.getChild())
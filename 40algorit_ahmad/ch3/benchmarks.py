@@ -0,0 +1,489 @@
+'''
+Benchmark runner for the sorting algorithms in sorts.py and the searches in searches.py.
+Author: Nat Hawkins
+Date (YYYY-MM-DD): 2026-10-18
+'''
+
+# Imports ----------------------------------------------------------------------
+from argparse import ArgumentParser
+from bisect import bisect_left
+import csv
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from searches import interpolationBisect, interpolationSearchMany
+from sorts import bubbleSort, insertionSort, mergeSort, shellSort, selectionSort, quickSort, autoSort, parallelSort
+
+# Constants --------------------------------------------------------------------
+ALGORITHMS = {"bubble": bubbleSort,
+              "insertion": insertionSort,
+              "merge": mergeSort,
+              "shell": shellSort,
+              "selection": selectionSort,
+              "quick": quickSort,
+              "auto": autoSort}
+
+# O(n^2) sorts are skipped above --max-quadratic-size
+QUADRATIC = {"bubble", "insertion", "selection"}
+
+# Sorts whose numeric path makes no comparisons. Counting wrappers would push
+# them onto their comparison fallback, so comparisons are not reported
+NON_COMPARISON = {"auto"}
+
+SHAPES = ("random", "sorted", "reversed", "few_unique", "nearly_sorted", "pivot_adversarial")
+
+KEYS = ("none", "cheap", "expensive")
+
+# Key distributions for the search benchmark
+SEARCH_SHAPES = ("uniform", "skewed", "duplicates")
+
+# Functions --------------------------------------------------------------------
+def constructCommandLineArguments():
+    parser = ArgumentParser()
+    parser.add_argument("-a", "--algorithms",
+                        help = f"Sorts to benchmark. Default: all of {', '.join(ALGORITHMS)}.",
+                        nargs = "+",
+                        default = list(ALGORITHMS))
+    parser.add_argument("-s", "--shapes",
+                        help = f"Input shapes to benchmark. Default: all of {', '.join(SHAPES)}.",
+                        nargs = "+",
+                        default = list(SHAPES))
+    parser.add_argument("-n", "--sizes",
+                        help = "Input sizes to benchmark. Default: 100 1000 10000.",
+                        nargs = "+",
+                        default = [100, 1000, 10000],
+                        type = int)
+    parser.add_argument("-q", "--max-quadratic-size",
+                        help = "Largest input size given to the O(n^2) sorts. Default: 10000.",
+                        default = 10000,
+                        type = int)
+    parser.add_argument("-k", "--keys",
+                        help = f"Key functions to sort with, from {', '.join(KEYS)}. Default: none.",
+                        nargs = "+",
+                        default = ["none"])
+    parser.add_argument("-r", "--repeats",
+                        help = "Timed runs per case, the fastest is reported. Default: 3.",
+                        default = 3,
+                        type = int)
+    parser.add_argument("-w", "--workers",
+                        help = "Run the parallelSort scaling benchmark with these worker counts (e.g. 1 2 4 8) over --sizes instead of the sweep.",
+                        nargs = "+",
+                        default = None,
+                        type = int)
+    parser.add_argument("-S", "--searches",
+                        help = "Run the search benchmark, reporting probes per query, over --sizes instead of the sweep.",
+                        action = "store_true")
+    parser.add_argument("-f", "--format",
+                        help = "Output format, 'json' or 'csv'. Default: 'json'.",
+                        default = 'json')
+    parser.add_argument("-o", "--output",
+                        help = "File to write results to. Default: standard output.",
+                        default = None)
+    parser.add_argument("-b", "--baseline",
+                        help = "JSON results of an earlier run. Exit with status 1 if any case is slower than the baseline by more than --threshold.",
+                        default = None)
+    parser.add_argument("-t", "--threshold",
+                        help = "Allowed fractional slowdown against the baseline. Default: 0.25.",
+                        default = 0.25,
+                        type = float)
+    return parser
+
+def generateInput(shape, n, seed = 8675309):
+    '''
+    Generate a list of n integers with the given shape.
+
+    Parameters
+    ----------
+    - shape (str): One of SHAPES.
+    - n (int): Number of elements.
+    - seed (int): Random seed for reproducibility. Default 8675309.
+
+    Returns
+    -------
+    list: Input data.
+
+    Doctests
+    --------
+    >>> generateInput("reversed", 5)
+    [4, 3, 2, 1, 0]
+    >>> generateInput("pivot_adversarial", 6)
+    [0, 5, 1, 4, 2, 3]
+    '''
+    rng = random.Random(seed + n)
+
+    if shape == "random":
+        return [rng.randrange(n) for _ in range(n)]
+    if shape == "sorted":
+        return list(range(n))
+    if shape == "reversed":
+        return list(range(n - 1, -1, -1))
+    if shape == "few_unique":
+        return [rng.randrange(10) for _ in range(n)]
+    if shape == "nearly_sorted":
+        # Sorted with ~1% of elements swapped with a random partner
+        arr = list(range(n))
+        for _ in range(max(1, n//100)):
+            i, j = rng.randrange(n), rng.randrange(n)
+            arr[i], arr[j] = arr[j], arr[i]
+        return arr
+    if shape == "pivot_adversarial":
+        # Alternate the smallest and largest remaining values so the first
+        # element of every partition is an extreme
+        arr = []
+        low, high = 0, n - 1
+        while low <= high:
+            arr.append(low)
+            if low != high:
+                arr.append(high)
+            low, high = low + 1, high - 1
+        return arr
+
+    raise ValueError(f"Unknown input shape {shape!r}, expecting one of {SHAPES}.")
+
+
+class KeyFunction:
+    """
+    Key function that counts its calls. 'cheap' negates the value, so
+    shapes come out reversed, 'expensive' parses the value out of a
+    JSON record on every call, as a key on real records might.
+    """
+    def __init__(self, name):
+        if name not in KEYS[1:]:
+            raise ValueError(f"Unknown key {name!r}, expecting one of {KEYS[1:]}.")
+        self.name  = name
+        self.calls = 0
+
+    def __call__(self, value):
+        self.calls += 1
+        if self.name == "cheap":
+            return -value
+        return json.loads(json.dumps({"id": value}))["id"]
+
+
+class Counted:
+    """
+    Wraps a value and counts every comparison made against it.
+    """
+    __slots__ = ('value',)
+    comparisons = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        Counted.comparisons += 1
+        return self.value < other.value
+
+    def __le__(self, other):
+        Counted.comparisons += 1
+        return self.value <= other.value
+
+    def __gt__(self, other):
+        Counted.comparisons += 1
+        return self.value > other.value
+
+    def __ge__(self, other):
+        Counted.comparisons += 1
+        return self.value >= other.value
+
+    def __eq__(self, other):
+        Counted.comparisons += 1
+        return self.value == other.value
+
+    __hash__ = None
+
+
+def runSort(sort, arr, key = None):
+    '''
+    Run a sort and return the sorted list, whether it sorts in place or
+    returns its input (quickSort).
+    '''
+    output = sort(arr) if key is None else sort(arr, key = key)
+    return arr if output is None else output
+
+def benchmarkCase(name, shape, n, repeats = 3, key_name = "none"):
+    '''
+    Benchmark one sort on one input.
+
+    Parameters
+    ----------
+    - name (str): Key of the sort in ALGORITHMS.
+    - shape (str): Input shape, one of SHAPES.
+    - n (int): Input size.
+    - repeats (int): Timed runs, the fastest is reported. Default 3.
+    - key_name (str): Key function, one of KEYS. Default 'none'.
+
+    Returns
+    -------
+    dict: Wall time in seconds, comparisons, key calls per element, peak
+    memory in bytes and status ('ok', or the error raised, e.g. RecursionError).
+    '''
+    sort = ALGORITHMS[name]
+    data = generateInput(shape, n)
+    key  = None if key_name == "none" else KeyFunction(key_name)
+    row  = {"algorithm": name, "shape": shape, "n": n, "key": key_name}
+
+    try:
+        # Wall time on plain values
+        best = float('inf')
+        for _ in range(repeats):
+            arr    = list(data)
+            start_ = time.perf_counter()
+            output = runSort(sort, arr, key)
+            best   = min(best, time.perf_counter() - start_)
+        key_calls = key.calls/(repeats*n) if key is not None and n else None
+        if output != sorted(data, key = key):
+            raise AssertionError("output is not sorted")
+
+        # Comparisons on counting wrappers (around the keys, if there are any)
+        Counted.comparisons = 0
+        if key is None and name in NON_COMPARISON:
+            Counted.comparisons = None
+        elif key is None:
+            runSort(sort, [Counted(value) for value in data])
+        else:
+            runSort(sort, list(data), lambda value: Counted(key(value)))
+        comparisons = Counted.comparisons
+
+        # Peak memory allocated while sorting
+        arr = list(data)
+        tracemalloc.start()
+        runSort(sort, arr, key)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    except (RecursionError, AssertionError) as error:
+        tracemalloc.stop()
+        row.update({"seconds": None, "comparisons": None, "key_calls_per_item": None, "peak_bytes": None,
+                    "status": f"{type(error).__name__}: {error}"})
+        return row
+
+    row.update({"seconds": best, "comparisons": comparisons, "key_calls_per_item": key_calls,
+                "peak_bytes": peak, "status": "ok"})
+    return row
+
+def runBenchmarks(algorithms, shapes, sizes, max_quadratic_size = 10000, repeats = 3, keys = ("none",)):
+    '''
+    Sweep every combination of algorithm, shape, size and key function.
+
+    Returns
+    -------
+    list: One dict per case, see benchmarkCase().
+    '''
+    results = []
+    for name in algorithms:
+        for shape in shapes:
+            for n in sizes:
+                if name in QUADRATIC and n > max_quadratic_size:
+                    continue
+                for key_name in keys:
+                    results.append(benchmarkCase(name, shape, n, repeats, key_name))
+    return results
+
+def benchmarkParallelScaling(sizes, worker_counts, repeats = 3, seed = 8675309):
+    '''
+    Time parallelSort on random float64 arrays for each worker count.
+
+    Parameters
+    ----------
+    - sizes (list): Array sizes, e.g. [10**7, 10**8].
+    - worker_counts (list): Worker counts, the first is the speedup baseline.
+    - repeats (int): Timed runs, the fastest is reported. Default 3.
+    - seed (int): Random seed. Default 8675309.
+
+    Returns
+    -------
+    list: One dict per size and worker count with seconds and speedup.
+    '''
+    results = []
+    for n in sizes:
+        data     = np.random.default_rng(seed + n).random(n)
+        baseline = None
+        for workers in worker_counts:
+            best = float('inf')
+            for _ in range(repeats):
+                arr    = data.copy()
+                start_ = time.perf_counter()
+                parallelSort(arr, workers = workers)
+                best   = min(best, time.perf_counter() - start_)
+            ok       = bool(np.all(arr[1:] >= arr[:-1]))
+            baseline = baseline or best
+            results.append({"algorithm": f"parallel_w{workers}", "shape": "random", "n": n, "key": "none",
+                            "workers": workers, "seconds": best, "speedup": baseline/best,
+                            "status": "ok" if ok else "AssertionError: output is not sorted"})
+    return results
+
+def benchmarkSearches(sizes, repeats = 3, queries = 1000, seed = 8675309):
+    '''
+    Time binary search (bisect) against interpolationBisect(), one query at a
+    time and batched with interpolationSearchMany(), counting probes.
+
+    Parameters
+    ----------
+    - sizes (list): Sorted array sizes.
+    - repeats (int): Timed runs, the fastest is reported. Default 3.
+    - queries (int): Searches per run, half of them for present keys. Default 1000.
+    - seed (int): Random seed. Default 8675309.
+
+    Returns
+    -------
+    list: One dict per size, key shape and search with seconds per query and probes per query.
+    '''
+    results = []
+    for n in sizes:
+        rng = np.random.default_rng(seed + n)
+        for shape in SEARCH_SHAPES:
+            if shape == "uniform":
+                values = rng.random(n)
+            elif shape == "skewed":
+                values = rng.random(n)**20
+            else:
+                values = rng.integers(0, max(1, n//100), n).astype(float)
+            arr    = np.sort(values).tolist()
+            needle = np.concatenate([rng.choice(values, queries//2), rng.random(queries - queries//2)]).tolist()
+            answer = [bisect_left(arr, x) for x in needle]
+
+            for name, search in SEARCHES.items():
+                best = float('inf')
+                for _ in range(repeats):
+                    start_            = time.perf_counter()
+                    positions, probes = search(arr, needle)
+                    best              = min(best, time.perf_counter() - start_)
+
+                # Probes of a plain bisection are its comparisons
+                if probes is None:
+                    wrapped = [Counted(value) for value in arr]
+                    Counted.comparisons = 0
+                    for x in needle:
+                        bisect_left(wrapped, Counted(x))
+                    probes = Counted.comparisons
+
+                results.append({"algorithm": name, "shape": shape, "n": n, "key": "none",
+                                "seconds": best, "seconds_per_query": best/queries,
+                                "probes_per_query": probes/queries,
+                                "status": "ok" if positions == answer else "AssertionError: wrong positions"})
+    return results
+
+def _searchBinary(arr, needle):
+    # Probes are counted separately, on wrapped values
+    return [bisect_left(arr, x) for x in needle], None
+
+def _searchEach(arr, needle):
+    # interpolationBisect() per query, with the total probes
+    positions, total = [], 0
+    for x in needle:
+        position, probes = interpolationBisect(arr, x)
+        positions.append(position)
+        total += probes
+    return positions, total
+
+def _searchBatch(arr, needle):
+    positions, total = interpolationSearchMany(arr, needle)
+    return positions.tolist(), total
+
+# Searches compared by benchmarkSearches(), each returning (positions, probes)
+SEARCHES = {"binary": _searchBinary,
+            "interpolation": _searchEach,
+            "interpolation_batch": _searchBatch}
+
+def writeResults(results, format = 'json', output = None):
+    '''
+    Write results as JSON or CSV to a file, or to standard output.
+    '''
+    f = open(output, 'w', newline = '') if output else sys.stdout
+    try:
+        if format == 'json':
+            json.dump(results, f, indent = 2)
+            f.write("\n")
+        elif format == 'csv':
+            writer = csv.DictWriter(f, fieldnames = list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            raise ValueError(f"Unknown output format {format!r}, expecting 'json' or 'csv'.")
+    finally:
+        if output:
+            f.close()
+
+def findRegressions(results, baseline, threshold = 0.25):
+    '''
+    Compare results against a baseline run.
+
+    Parameters
+    ----------
+    - results (list): Rows from runBenchmarks().
+    - baseline (list): Rows from an earlier runBenchmarks().
+    - threshold (float): Allowed fractional slowdown. Default 0.25.
+
+    Returns
+    -------
+    list: Description of every case slower than the baseline by more than
+    threshold, or that used to succeed and now fails.
+
+    Doctests
+    --------
+    >>> old = [{"algorithm": "merge", "shape": "random", "n": 10, "seconds": 1.0, "status": "ok"}]
+    >>> new = [{"algorithm": "merge", "shape": "random", "n": 10, "seconds": 1.5, "status": "ok"}]
+    >>> findRegressions(new, old, threshold = 0.25)
+    ['merge/random/n=10: 1.5s vs 1s baseline (+50%)']
+    >>> findRegressions(new, old, threshold = 0.75)
+    []
+    '''
+    previous    = {_case(row): row for row in baseline}
+    regressions = []
+    for row in results:
+        case = _case(row)
+        old  = previous.get(case)
+        if old is None or old["status"] != "ok":
+            continue
+
+        label = f"{case[0]}/{case[1]}/n={case[2]}" + (f"/key={case[3]}" if case[3] != "none" else "")
+        if row["status"] != "ok":
+            regressions.append(f"{label}: {row['status']} (ok in baseline)")
+        elif row["seconds"] > old["seconds"]*(1 + threshold):
+            change = row["seconds"]/old["seconds"] - 1
+            regressions.append(f"{label}: {row['seconds']:.3g}s vs {old['seconds']:.3g}s baseline (+{change:.0%})")
+    return regressions
+
+def _case(row):
+    # Baselines from before key support have no key column
+    return (row["algorithm"], row["shape"], row["n"], row.get("key", "none"))
+
+
+# Main -------------------------------------------------------------------------
+def main():
+    parser = constructCommandLineArguments()
+    args   = parser.parse_args()
+
+    if args.workers:
+        results = benchmarkParallelScaling(args.sizes, args.workers, args.repeats)
+    elif args.searches:
+        results = benchmarkSearches(args.sizes, args.repeats)
+    else:
+        results = runBenchmarks(args.algorithms, args.shapes, args.sizes,
+                                max_quadratic_size = args.max_quadratic_size,
+                                repeats = args.repeats,
+                                keys = args.keys)
+    writeResults(results, args.format, args.output)
+
+    # Regression mode
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = findRegressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:", file = sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file = sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+'''
+External merge sort for datasets larger than memory.
+Author: Nat Hawkins
+Date (YYYY-MM-DD): 2026-10-18
+'''
+
+# Imports ----------------------------------------------------------------------
+from argparse import ArgumentParser
+import heapq
+import os
+import pickle
+import struct
+import sys
+import tempfile
+
+from sorts import mergeSort
+
+# Codecs -----------------------------------------------------------------------
+class LineCodec:
+    """
+    Text records, one per line. Records must not contain newlines.
+    """
+    def __init__(self, encoding = 'utf-8'):
+        self.encoding = encoding
+
+    def write(self, f, record):
+        f.write(record.encode(self.encoding))
+        f.write(b'\n')
+
+    def read(self, f):
+        for line in f:
+            yield line.rstrip(b'\n').decode(self.encoding)
+
+
+class StructCodec:
+    """
+    Fixed-width binary records described by a struct format string, e.g.
+    'qd' for an (int64, float64) tuple. Single field formats read back as
+    plain values rather than 1-tuples.
+    """
+    def __init__(self, record_format):
+        self.record = struct.Struct(record_format)
+        self.scalar = len(self.record.unpack(bytes(self.record.size))) == 1
+
+    def write(self, f, record):
+        f.write(self.record.pack(record) if self.scalar else self.record.pack(*record))
+
+    def read(self, f):
+        for fields in self._chunks(f):
+            yield fields[0] if self.scalar else fields
+
+    def _chunks(self, f, records_per_read = 4096):
+        # Read many records at a time without loading the whole run
+        while True:
+            data = f.read(self.record.size*records_per_read)
+            if not data:
+                return
+            yield from self.record.iter_unpack(data)
+
+
+class PickleCodec:
+    """
+    Any picklable Python object. Slowest, but works for arbitrary records.
+    """
+    def write(self, f, record):
+        pickle.dump(record, f, protocol = pickle.HIGHEST_PROTOCOL)
+
+    def read(self, f):
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+# Functions --------------------------------------------------------------------
+def constructCommandLineArguments():
+    parser = ArgumentParser()
+    parser.add_argument("input",
+                        help = "Text file to sort, one record per line.")
+    parser.add_argument("output",
+                        help = "File to write the sorted lines to. '-' for standard output.")
+    parser.add_argument("-m", "--memory-mb",
+                        help = "Memory budget for in-memory chunks, in MB. Default: 64.",
+                        default = 64,
+                        type = float)
+    parser.add_argument("-d", "--temp-dir",
+                        help = "Directory for sorted runs. Default: the system temp directory.",
+                        default = None)
+    parser.add_argument("-r", "--reverse",
+                        help = "Sort in descending order.",
+                        action = "store_true")
+    parser.add_argument("-n", "--numeric",
+                        help = "Compare lines as numbers rather than strings.",
+                        action = "store_true")
+    return parser
+
+def externalSort(records,
+                 key = None,
+                 reverse = False,
+                 memory_budget = 64*2**20,
+                 temp_dir = None,
+                 codec = None,
+                 sort = mergeSort,
+                 max_fan_in = 64):
+    '''
+    Sort a stream of records that may not fit in memory, lazily.
+
+    Records are buffered until the buffer reaches memory_budget bytes, then
+    the chunk is sorted in memory and spilled to a temporary file as a sorted
+    run. Runs are combined with a heap-based k-way merge (at most max_fan_in
+    runs at a time, with extra merge passes if there are more) and the sorted
+    records are yielded one at a time. Temporary files are removed when the
+    generator is exhausted or closed.
+
+    With the default mergeSort the result is stable: equal records keep their
+    input order, since earlier runs win ties in the merge.
+
+    Parameters
+    ----------
+    - records (Iterable): Records to sort, consumed once.
+    - key (function): Optional. Function of one argument returning the sort key.
+    - reverse (bool): Sort in descending order.
+    - memory_budget (int): Approximate bytes of records held in memory at once. Default 64 MB.
+    - temp_dir (str): Optional. Directory to write runs to. Default is the system temp directory.
+    - codec: Optional. Object with write(f, record) and read(f) used to spill runs
+      to binary files, e.g. LineCodec(), StructCodec('qd'). Default PickleCodec().
+    - sort (function): In-place sort accepting key and reverse, e.g. mergeSort
+      or quickSort from sorts.py. Default mergeSort.
+    - max_fan_in (int): Maximum runs merged at once. Default 64.
+
+    Returns
+    -------
+    generator: Sorted records.
+
+    Doctests
+    --------
+    >>> list(externalSort([5, 3, 9, 1, 7, 2, 8], memory_budget = 64))
+    [1, 2, 3, 5, 7, 8, 9]
+    >>> words = ["pear", "Fig", "apple", "fig", "Pear"]
+    >>> list(externalSort(words, key = str.lower, memory_budget = 100, codec = LineCodec(), max_fan_in = 2))
+    ['apple', 'Fig', 'fig', 'pear', 'Pear']
+    '''
+    codec = codec if codec is not None else PickleCodec()
+
+    with tempfile.TemporaryDirectory(dir = temp_dir) as directory:
+        runs  = []
+        chunk = []
+        size  = 0
+        for record in records:
+            chunk.append(record)
+            # Object size plus the list slot pointing to it
+            size += sys.getsizeof(record) + 8
+            if size >= memory_budget:
+                sort(chunk, key = key, reverse = reverse)
+                runs.append(_spillRun(chunk, directory, codec))
+                chunk, size = [], 0
+
+        # Everything fit in memory, no need to touch the disk
+        if not runs:
+            sort(chunk, key = key, reverse = reverse)
+            yield from chunk
+            return
+
+        if chunk:
+            sort(chunk, key = key, reverse = reverse)
+            runs.append(_spillRun(chunk, directory, codec))
+        del chunk
+
+        # Merge in passes until the remaining runs can be opened together
+        while len(runs) > max_fan_in:
+            merged = []
+            for i in range(0, len(runs), max_fan_in):
+                group = runs[i:i + max_fan_in]
+                merged.append(_spillRun(_mergeRuns(group, key, reverse, codec), directory, codec))
+                for path in group:
+                    os.remove(path)
+            runs = merged
+
+        yield from _mergeRuns(runs, key, reverse, codec)
+
+def externalSortFile(input_path, output_path, codec = None, **kwargs):
+    '''
+    Sort a file of records into another file with externalSort().
+
+    Parameters
+    ----------
+    - input_path (str): File of records encoded with codec.
+    - output_path (str): File to write sorted records to with codec.
+    - codec: Optional. Record codec for both files. Default LineCodec().
+    - kwargs: Passed on to externalSort().
+    '''
+    codec = codec if codec is not None else LineCodec()
+    with open(input_path, 'rb') as source, open(output_path, 'wb') as target:
+        for record in externalSort(codec.read(source), codec = codec, **kwargs):
+            codec.write(target, record)
+
+def _spillRun(records, directory, codec):
+    # Write records to a new run file and return its path
+    descriptor, path = tempfile.mkstemp(dir = directory, suffix = '.run')
+    with os.fdopen(descriptor, 'wb') as f:
+        for record in records:
+            codec.write(f, record)
+    return path
+
+def _mergeRuns(paths, key, reverse, codec):
+    # k-way heap merge of sorted run files. heapq.merge keeps one record per
+    # run in its heap and breaks ties in favour of earlier runs
+    files = [open(path, 'rb') for path in paths]
+    try:
+        yield from heapq.merge(*(codec.read(f) for f in files), key = key, reverse = reverse)
+    finally:
+        for f in files:
+            f.close()
+
+
+# Main -------------------------------------------------------------------------
+def main():
+    parser = constructCommandLineArguments()
+    args   = parser.parse_args()
+
+    options = {"key": float if args.numeric else None,
+               "reverse": args.reverse,
+               "memory_budget": int(args.memory_mb*2**20),
+               "temp_dir": args.temp_dir}
+
+    if args.output == '-':
+        codec = LineCodec()
+        with open(args.input, 'rb') as source:
+            for record in externalSort(codec.read(source), codec = codec, **options):
+                print(record)
+    else:
+        externalSortFile(args.input, args.output, **options)
+
+    return 0
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,12 @@
-from sorts import bubbleSort
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import islice
+import math
+import sys
+
+import numpy as np
+
+from sorts import autoSort, bubbleSort
 
 def linearSearch(arr, item):
     for val in arr:
@@ -33,43 +41,517 @@ def binarySearch(arr, item):
 
 def interpolationSearch(arr, item):
     # Requires sorted array
-    bubbleSort(arr)
+    autoSort(arr)
 
-    # Define bounds of search which will change
-    starting_index = 0
-    ending_index   = len(arr) - 1
+    position, _ = interpolationBisect(arr, item)
+    return position < len(arr) and arr[position] == item
 
-    while starting_index <= ending_index and item >= arr[starting_index] and item <= arr[ending_index]:
-        # Calculate the midpoint
-        # 1. Number of indices between start and end
-        term_1 = float(ending_index - starting_index)
+# Consecutive interpolation guesses that fail to halve the search range
+# before a bisection step is forced
+MAX_BAD_GUESSES = 2
 
-        # 2. Difference between values at that index
-        term_2 = arr[ending_index] - arr[starting_index]
+def interpolationBisect(arr, item, lo = 0, hi = None):
+    '''
+    Guarded interpolation search: the position item would be inserted at
+    in the sorted numeric sequence arr, before any equal values (like
+    bisect.bisect_left), and the number of probes it took.
 
-        # 3. Quotient of term 1 and 2
-        term_3 = term_1/term_2
+    Each probe guesses the position from where item falls between the
+    values at the ends of the current range, which takes O(log log n)
+    expected probes on uniformly distributed keys. After MAX_BAD_GUESSES
+    consecutive guesses that fail to halve the range, a bisection step is
+    taken instead, so skewed keys still take O(log n) probes.
 
-        # 4. Multiply by difference between target item and starting index
-        term_4 = item - arr[starting_index]
+    Parameters
+    ----------
+    - arr (Sequence): Sorted ints or floats.
+    - item (int, float): Value to search for.
+    - lo (int): Optional. Start of the range to search. Default 0.
+    - hi (int): Optional. End (exclusive) of the range to search. Default len(arr).
 
-        # 5. Product of term 3 and 4
-        term_5 = int(term_3 * term_4)
+    Returns
+    -------
+    tuple: (position, probes)
 
-        # 6. Add that to the syatyomg index to move it
-        # Idea is to figure out the average number of indices
-        # to cover range of values, then multiply that by how much
-        # the target item is from our starting position
-        midpoint = starting_index + term_5
+    Doctests
+    --------
+    >>> interpolationBisect([3, 9, 12, 67, 67, 111], 67)
+    (3, 2)
+    >>> interpolationBisect([5, 5, 5, 5], 5), interpolationBisect([5, 5, 5, 5], 6)
+    ((0, 1), (4, 1))
+    >>> interpolationBisect([1, 2, 3, 4, 1000000], 4)
+    (3, 4)
+    >>> interpolationBisect(np.array([-2**62, 0, 2**62]), np.int64(2**62 - 1))
+    (2, 2)
+    '''
+    # NumPy scalars become Python numbers, so the interpolation below
+    # cannot overflow on wide ranges of int64 values
+    item   = _toPython(item)
+    hi     = len(arr) if hi is None else hi
+    bad    = 0
+    probes = 0
 
-        if arr[midpoint] == item:
-            return True
+    # The answer is always in [lo, hi]
+    while lo < hi:
+        probes += 1
+        size    = hi - lo
+        first   = _toPython(arr[lo])
+        last    = _toPython(arr[hi - 1])
+
+        # Also covers every value in the range being equal
+        if item <= first:
+            return lo, probes
+        if item > last:
+            return hi, probes
+
+        if bad < MAX_BAD_GUESSES:
+            # first < item <= last, so the guess lands inside the range
+            midpoint = lo + min(int((item - first)/(last - first)*(size - 1)), size - 1)
+        else:
+            midpoint = (lo + hi)//2
 
-                
         if arr[midpoint] < item:
-            starting_index = midpoint + 1
+            lo = midpoint + 1
+        else:
+            hi = midpoint
 
-    return False
+        bad = bad + 1 if bad < MAX_BAD_GUESSES and 2*(hi - lo) > size else 0
+
+    return lo, probes
+
+def interpolationSearchMany(arr, items):
+    '''
+    interpolationBisect() for many items. Items are searched in ascending
+    order so each search starts where the previous one ended.
+
+    Parameters
+    ----------
+    - arr (Sequence): Sorted ints or floats.
+    - items (Iterable): Values to search for, in any order.
+
+    Returns
+    -------
+    tuple: (numpy.ndarray of positions in the order of items, total probes)
+
+    Doctests
+    --------
+    >>> positions, probes = interpolationSearchMany([3, 9, 12, 67, 67, 111], [111, 4, 67, 0])
+    >>> positions.tolist()
+    [5, 1, 3, 0]
+    '''
+    items     = np.asarray(items)
+    order     = np.argsort(items, kind = 'stable')
+    positions = np.empty(len(items), dtype = np.intp)
+    total     = 0
+    lo        = 0
+    for i in order.tolist():
+        lo, probes    = interpolationBisect(arr, items[i].item(), lo)
+        positions[i]  = lo
+        total        += probes
+    return positions, total
+
+def exponentialSearch(arr, item, lo = 0):
+    '''
+    Galloping search: the position item would be inserted at in the sorted
+    sequence arr, before any equal values (like bisect.bisect_left).
+
+    Probes lo, lo + 1, lo + 2, lo + 4, ... until it passes item or the end
+    of arr, then bisects the last gap. Only arr[i] is used, never len(arr):
+    indexing past the end must raise IndexError, as lists and PagedSequence
+    do. It takes O(log i) probes where i is the distance from lo to the
+    answer, so items near the front stay cheap however long arr is.
+
+    Parameters
+    ----------
+    - arr (Sequence): Sorted values supporting arr[i].
+    - item: Value to search for.
+    - lo (int): Optional. Position to start galloping from. Default 0.
+
+    Returns
+    -------
+    int: Insertion position.
+
+    Doctests
+    --------
+    >>> exponentialSearch([3, 9, 12, 67, 67, 111], 67), exponentialSearch([3, 9, 12], 100)
+    (3, 3)
+    >>> log = PagedSequence(lambda page: list(range(page*100, min(page*100 + 100, 10**6))), page_size = 100)
+    >>> exponentialSearch(log, 1234), log.fetches
+    (1234, 9)
+    '''
+    # Gallop until arr[hi] >= item, or hi is past the end
+    step = 1
+    prev = lo - 1
+    hi   = lo
+    while _below(arr, hi, item):
+        prev  = hi
+        hi    = lo + step
+        step *= 2
+
+    # Answer is in (prev, hi]
+    lo = prev + 1
+    while lo < hi:
+        midpoint = (lo + hi)//2
+        if _below(arr, midpoint, item):
+            lo = midpoint + 1
+        else:
+            hi = midpoint
+    return lo
+
+def _toPython(value):
+    # Python int or float for a NumPy scalar, anything else unchanged
+    return value.item() if isinstance(value, np.generic) else value
+
+def _below(arr, index, item):
+    # Whether arr[index] < item, with positions past the end as +infinity
+    try:
+        return arr[index] < item
+    except IndexError:
+        return False
+
+
+class PagedSequence:
+    """
+    Read-only sequence over data fetched a page at a time, e.g. a sorted
+    log read from disk or a paged API, with an LRU cache of pages.
+
+    Its length is never needed: indexing past the last page raises
+    IndexError, so exponentialSearch() can search it without knowing
+    how long it is.
+
+    Attributes
+    ----------
+    fetch_page : function
+        Called with a page number, returns a list of up to page_size items.
+        A shorter list marks the last page, an empty one a page past the end
+    page_size : int
+        Items per page
+    cache_pages : int
+        Most pages kept in the cache
+    fetches : int
+        Number of calls to fetch_page so far
+    """
+    def __init__(self, fetch_page, page_size, cache_pages = 64):
+        self.fetch_page  = fetch_page
+        self.page_size   = page_size
+        self.cache_pages = cache_pages
+        self.fetches     = 0
+        self._cache      = OrderedDict()
+        self._last_page  = None
+
+    def __getitem__(self, index):
+        if index < 0:
+            raise IndexError("PagedSequence does not support negative indices.")
+
+        number, offset = divmod(index, self.page_size)
+        page = self._page(number)
+        if offset >= len(page):
+            raise IndexError(f"Index {index} is past the end of the sequence.")
+        return page[offset]
+
+    def _page(self, number):
+        if number in self._cache:
+            self._cache.move_to_end(number)
+            return self._cache[number]
+
+        # No need to ask for pages past a short page
+        if self._last_page is not None and number > self._last_page:
+            return []
+
+        page = self.fetch_page(number)
+        self.fetches += 1
+        if len(page) < self.page_size and (self._last_page is None or number < self._last_page):
+            self._last_page = number
+
+        self._cache[number] = page
+        if len(self._cache) > self.cache_pages:
+            self._cache.popitem(last = False)
+        return page
+
+
+class SortedIndex:
+    """
+    A sorted copy of a collection for answering many searches.
+
+    The values are sorted once, in O(n log n), after which every query
+    is a binary search taking O(log n), instead of re-sorting per lookup
+    like binarySearch() and interpolationSearch(). Ints and floats are
+    also kept as a NumPy array so batches of needles are searched in a
+    single vectorized call.
+
+    Attributes
+    ----------
+    values : list
+        The values in ascending order
+    array : numpy.ndarray
+        values as a NumPy array, or None if they are not all numbers
+
+    Methods
+    -------
+    find(item):
+        Position of the first value equal to item, None if absent
+    bisectLeft(item):
+        Position item would be inserted at, before any equal values
+    bisectRight(item):
+        Position item would be inserted at, after any equal values
+    rank(item):
+        Number of values less than item
+    rangeCount(low, high):
+        Number of values v with low <= v <= high
+    rangeScan(low, high):
+        List of values v with low <= v <= high, in order
+    searchMany(needles, side):
+        Array of insertion positions of every needle
+    findMany(needles):
+        Array of positions of every needle, -1 where absent
+    containsMany(needles):
+        Boolean array, True where the needle is present
+
+    Doctests
+    --------
+    >>> index = SortedIndex([12, 67, 3, 111, 67, 9])
+    >>> index.values
+    [3, 9, 12, 67, 67, 111]
+    >>> 67 in index, 68 in index
+    (True, False)
+    >>> index.find(67), index.find(68)
+    (3, None)
+    >>> index.bisectLeft(67), index.bisectRight(67), index.rank(100)
+    (3, 5, 5)
+    >>> index.rangeCount(9, 67), index.rangeScan(10, 100)
+    (4, [12, 67, 67])
+    >>> index.findMany([111, 4, 3]).tolist()
+    [5, -1, 0]
+    >>> SortedIndex(["pear", "fig", "apple"]).containsMany(["fig", "kiwi"]).tolist()
+    [True, False]
+    """
+    def __init__(self, values):
+        self.values = autoSort(list(values))
+        self.array  = None
+
+        kinds = set(map(type, self.values))
+        if kinds == {int} or kinds == {float}:
+            array = np.asarray(self.values)
+            if array.dtype.kind in 'iuf':
+                self.array = array
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, item):
+        return self.find(item) is not None
+
+    def find(self, item):
+        position = bisect_left(self.values, item)
+        if position < len(self.values) and self.values[position] == item:
+            return position
+        return None
+
+    def bisectLeft(self, item):
+        return bisect_left(self.values, item)
+
+    def bisectRight(self, item):
+        return bisect_right(self.values, item)
+
+    def rank(self, item):
+        return bisect_left(self.values, item)
+
+    def rangeCount(self, low, high):
+        return max(0, bisect_right(self.values, high) - bisect_left(self.values, low))
+
+    def rangeScan(self, low, high):
+        return self.values[bisect_left(self.values, low):bisect_right(self.values, high)]
+
+    def searchMany(self, needles, side = 'left'):
+        if self.array is not None:
+            return np.searchsorted(self.array, np.asarray(needles), side = side)
+
+        # Not numeric, search one needle at a time
+        search = bisect_left if side == 'left' else bisect_right
+        return np.fromiter((search(self.values, needle) for needle in needles), dtype = np.intp)
+
+    def findMany(self, needles):
+        if self.array is None:
+            return np.fromiter((-1 if (position := self.find(needle)) is None else position
+                                for needle in needles), dtype = np.intp)
+
+        needles   = np.asarray(needles)
+        positions = np.searchsorted(self.array, needles)
+        # Clip so needles past the end compare against the last value
+        found     = self.array[np.minimum(positions, len(self.array) - 1)] == needles
+        return np.where(found, positions, -1)
+
+    def containsMany(self, needles):
+        return self.findMany(needles) >= 0
+
+
+class MembershipIndex:
+    """
+    Answers "is this item in the collection?" without scanning it like
+    linearSearch() does.
+
+    Items go in a hash set for exact O(1) answers. Optionally, a Bloom
+    filter is kept as well: a bit array where each item sets k bits,
+    sized for the given capacity and false positive rate. A clear bit
+    proves an item is absent, so misses are rejected without touching
+    the set. With exact = False only the Bloom filter is kept, which
+    takes ~1.2 bytes per item at a 1% false positive rate, at the cost
+    of answering True for some items that were never added.
+
+    Attributes
+    ----------
+    items : set
+        Every item added, None if exact is False
+    bits : numpy.ndarray
+        Bloom filter bit array as uint8, None without a Bloom filter
+    num_bits : int
+        Bits in the Bloom filter
+    num_hashes : int
+        Bits set per item in the Bloom filter
+    count : int
+        Number of items added
+
+    Methods
+    -------
+    add(item):
+        Add one item
+    update(items):
+        Add every item of an iterable, in bulk
+    containsMany(items):
+        Boolean array, True where the item is (probably, without exact) present
+    falsePositiveRate():
+        Expected Bloom filter false positive rate at the current count
+    memoryFootprint():
+        Bytes used by the set and the Bloom filter
+
+    Doctests
+    --------
+    >>> index = MembershipIndex(range(0, 1000, 2), bloom = True)
+    >>> 10 in index, 11 in index
+    (True, False)
+    >>> index.containsMany([0, 1, 998, 999]).tolist()
+    [True, False, True, False]
+    >>> compact = MembershipIndex(iter(range(1000)), bloom = True, exact = False, capacity = 1000)
+    >>> bool(compact.containsMany(range(1000)).all())
+    True
+    >>> compact.memoryFootprint()["bloom_bytes"]
+    1199
+    """
+    # Items hashed per vectorized batch when building or querying in bulk
+    _CHUNK = 1 << 16
+
+    def __init__(self, items = (), bloom = False, false_positive_rate = 0.01, capacity = None, exact = True):
+        if not (bloom or exact):
+            raise ValueError("MembershipIndex needs a hash set (exact = True), a Bloom filter (bloom = True) or both.")
+
+        self.items      = set() if exact else None
+        self.bits       = None
+        self.num_bits   = 0
+        self.num_hashes = 0
+        self.count      = 0
+
+        if bloom:
+            if capacity is None:
+                if not hasattr(items, '__len__'):
+                    raise ValueError("capacity is required to size a Bloom filter built from an iterator.")
+                capacity = len(items)
+            if not 0 < false_positive_rate < 1:
+                raise ValueError(f"false_positive_rate must be between 0 and 1, not {false_positive_rate}.")
+
+            # Optimal sizes for n items at false positive rate p:
+            # m = -n ln(p)/ln(2)^2 bits and k = (m/n) ln(2) hashes
+            capacity        = max(1, capacity)
+            self.num_bits   = max(8, math.ceil(-capacity*math.log(false_positive_rate)/math.log(2)**2))
+            self.num_hashes = max(1, round(self.num_bits/capacity*math.log(2)))
+            self.bits       = np.zeros((self.num_bits + 7)//8, dtype = np.uint8)
+
+        self.update(items)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, item):
+        if self.bits is not None:
+            bytes_, masks = self._bitPositions([item])
+            if not np.all(self.bits[bytes_] & masks):
+                return False
+        return self.items is None or item in self.items
+
+    def add(self, item):
+        self.update((item,))
+
+    def update(self, items):
+        items = iter(items)
+        while True:
+            chunk = list(islice(items, self._CHUNK))
+            if not chunk:
+                return
+
+            if self.items is not None:
+                before = len(self.items)
+                self.items.update(chunk)
+                self.count += len(self.items) - before
+            else:
+                # Without the set duplicates cannot be detected
+                self.count += len(chunk)
+
+            if self.bits is not None:
+                bytes_, masks = self._bitPositions(chunk)
+                np.bitwise_or.at(self.bits, bytes_, masks)
+
+    def containsMany(self, items):
+        found = []
+        items = iter(items)
+        while True:
+            chunk = list(islice(items, self._CHUNK))
+            if not chunk:
+                break
+
+            if self.bits is None:
+                found.append(np.fromiter((item in self.items for item in chunk), dtype = bool, count = len(chunk)))
+                continue
+
+            # An item may be present only if all k of its bits are set
+            bytes_, masks = self._bitPositions(chunk)
+            maybe = np.all(self.bits[bytes_] & masks, axis = 0)
+            if self.items is not None:
+                # Only the Bloom filter's positives need the exact check
+                for i in np.flatnonzero(maybe).tolist():
+                    maybe[i] = chunk[i] in self.items
+            found.append(maybe)
+
+        return np.concatenate(found) if found else np.zeros(0, dtype = bool)
+
+    def falsePositiveRate(self):
+        if self.bits is None:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes*self.count/self.num_bits))**self.num_hashes
+
+    def memoryFootprint(self):
+        # The set's own table, not the items, which are shared with the caller
+        set_bytes   = sys.getsizeof(self.items) if self.items is not None else 0
+        bloom_bytes = self.bits.nbytes if self.bits is not None else 0
+        return {"items": self.count, "set_bytes": set_bytes, "bloom_bytes": bloom_bytes,
+                "total_bytes": set_bytes + bloom_bytes}
+
+    def _bitPositions(self, items):
+        # Byte offsets and bit masks of the k bits of every item, shape
+        # (k, len(items)), by double hashing h1 + i*h2 of two mixes of hash()
+        hashes = np.fromiter((hash(item) for item in items), dtype = np.int64, count = len(items)).view(np.uint64)
+        first  = _mix64(hashes)
+        second = _mix64(first) | np.uint64(1)
+        steps  = np.arange(self.num_hashes, dtype = np.uint64)[:, None]
+        with np.errstate(over = 'ignore'):
+            positions = (first + steps*second) % np.uint64(self.num_bits)
+        return positions >> np.uint64(3), (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8))
+
+def _mix64(values):
+    # splitmix64 finalizer, spreads Python's near-identity int hashes over 64 bits
+    with np.errstate(over = 'ignore'):
+        values = values + np.uint64(0x9E3779B97F4A7C15)
+        values = (values ^ (values >> np.uint64(30)))*np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27)))*np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
 
 
 if __name__ == '__main__':
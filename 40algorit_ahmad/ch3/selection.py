@@ -0,0 +1,256 @@
+'''
+Selection algorithms: k-th smallest, top-k and median without a full sort.
+Author: Nat Hawkins
+Date (YYYY-MM-DD): 2026-10-18
+'''
+
+# Imports ----------------------------------------------------------------------
+import heapq
+
+from sorts import _insertionSortRange, _medianOfThree
+
+# Functions --------------------------------------------------------------------
+def nthElement(arr, n):
+    '''
+    Rearrange arr in place so arr[n] holds the value it would hold if arr
+    were sorted, every element before it is <= arr[n] and every element after
+    it is >= arr[n] (like C++ std::nth_element).
+
+    Quickselect with median-of-three pivots and three-way partitioning, which
+    switches to median-of-medians pivots if partitioning stops making progress,
+    so the worst case stays O(n).
+
+    Parameters
+    ----------
+    - arr (list): Values to partially sort in place.
+    - n (int): Position to fill, 0-based. Negative positions count from the end.
+
+    Returns
+    -------
+    The value at arr[n].
+
+    Raises
+    ------
+    IndexError: n is out of range
+
+    Doctests
+    --------
+    >>> arr = [9, 1, 8, 2, 7, 3, 6, 4, 5]
+    >>> nthElement(arr, 3)
+    4
+    >>> max(arr[:3]) <= arr[3] <= min(arr[4:])
+    True
+    '''
+    length = len(arr)
+    if n < 0:
+        n += length
+    if not 0 <= n < length:
+        raise IndexError(f"Position {n} out of range for {length} elements.")
+
+    # Allow ~2*log2(n) quickselect rounds before guaranteeing linear time
+    _introSelect(arr, 0, length - 1, n, 2*length.bit_length())
+    return arr[n]
+
+def select(arr, k, key = None):
+    '''
+    Return the k-th smallest element (0-based) of arr in O(n) time without
+    modifying arr.
+
+    Parameters
+    ----------
+    - arr (Iterable): Values to select from.
+    - k (int): Rank to return, 0 is the minimum. Negative ranks count from the largest.
+    - key (function): Optional. Function of one argument returning the comparison key.
+
+    Returns
+    -------
+    The element of rank k. Among equal keys, the one earliest in arr.
+
+    Doctests
+    --------
+    >>> select([5, 3, 9, 1, 7], 0), select([5, 3, 9, 1, 7], 2), select([5, 3, 9, 1, 7], -1)
+    (1, 5, 9)
+    >>> select(["pear", "fig", "apple"], 0, key = len)
+    'fig'
+    '''
+    items = list(arr)
+    if key is None:
+        return nthElement(items, k)
+
+    # (key, index) pairs evaluate key once per element and break ties by position
+    decorated = [(key(item), i) for i, item in enumerate(items)]
+    return items[nthElement(decorated, k)[1]]
+
+def topK(arr, k, largest = False, key = None):
+    '''
+    Return the k smallest (or largest) elements of arr, in sorted order, in
+    O(n + k log k) time. Equivalent to sorted(arr, key = key, reverse = largest)[:k].
+
+    Parameters
+    ----------
+    - arr (Iterable): Values to select from.
+    - k (int): Number of elements to return.
+    - largest (bool): Return the k largest instead of the k smallest.
+    - key (function): Optional. Function of one argument returning the comparison key.
+
+    Returns
+    -------
+    list: Up to k elements, best first.
+
+    Doctests
+    --------
+    >>> topK([5, 3, 9, 1, 7, 3], 3)
+    [1, 3, 3]
+    >>> topK([5, 3, 9, 1, 7, 3], 2, largest = True)
+    [9, 7]
+    '''
+    items = list(arr)
+    k     = min(k, len(items))
+    if k <= 0:
+        return []
+
+    # Largest first is smallest first on the reversed order, with ties
+    # still going to the earlier element
+    keys      = map(key, items) if key else items
+    decorated = [(_Reversed(value) if largest else value, i) for i, value in enumerate(keys)]
+    if k < len(decorated):
+        nthElement(decorated, k - 1)
+    best = decorated[:k]
+    best.sort()
+    return [items[i] for _, i in best]
+
+def streamingTopK(iterable, k, largest = False, key = None):
+    '''
+    Return the k smallest (or largest) elements of an iterator in sorted
+    order using a bounded heap: O(n log k) time and O(k) memory, so the input
+    is never materialized.
+
+    Parameters
+    ----------
+    - iterable (Iterable): Values to select from, consumed once.
+    - k (int): Number of elements to return.
+    - largest (bool): Return the k largest instead of the k smallest.
+    - key (function): Optional. Function of one argument returning the comparison key.
+
+    Returns
+    -------
+    list: Up to k elements, best first. Ties go to the earlier element.
+
+    Doctests
+    --------
+    >>> streamingTopK(iter([5, 3, 9, 1, 7, 3]), 3)
+    [1, 3, 3]
+    >>> streamingTopK((x*x for x in range(-5, 4)), 2, largest = True)
+    [25, 16]
+    '''
+    if k <= 0:
+        return []
+
+    # The heap root is always the worst element kept so far. Entries are
+    # (rank, item) where rank orders worst first and never ties
+    heap = []
+    for i, item in enumerate(iterable):
+        value = key(item) if key else item
+        rank  = (value, -i) if largest else _Reversed((value, i))
+        if len(heap) < k:
+            heapq.heappush(heap, (rank, item))
+        elif heap[0][0] < rank:
+            heapq.heapreplace(heap, (rank, item))
+
+    # Best first: largest ranks first
+    return [item for _, item in sorted(heap, key = lambda entry: entry[0], reverse = True)]
+
+def median(arr):
+    '''
+    Median of numeric values in O(n) time, averaging the two middle values
+    when there is an even number of them.
+
+    Doctests
+    --------
+    >>> median([7, 1, 3]), median([4, 1, 3, 2])
+    (3, 2.5)
+    '''
+    items = list(arr)
+    if not items:
+        raise ValueError("median() of an empty sequence.")
+
+    upper = nthElement(items, len(items)//2)
+    if len(items) % 2:
+        return upper
+
+    # The lower middle is the largest value left of the upper middle
+    return (max(items[:len(items)//2]) + upper)/2
+
+def _introSelect(arr, lo, hi, k, budget):
+    # Narrow arr[lo:hi+1] down to the partition holding position k
+    while hi > lo:
+        if hi - lo < 16:
+            _insertionSortRange(arr, lo, hi)
+            return
+
+        if budget > 0:
+            budget -= 1
+            pivot = arr[_medianOfThree(arr, lo, (lo + hi)//2, hi)]
+        else:
+            pivot = arr[_medianOfMedians(arr, lo, hi)]
+
+        lt, gt = _threeWayPartition(arr, lo, hi, pivot)
+        if k < lt:
+            hi = lt - 1
+        elif k > gt:
+            lo = gt + 1
+        else:
+            return
+
+def _medianOfMedians(arr, lo, hi):
+    # Index of an approximate median of arr[lo:hi+1] that is guaranteed to
+    # have at least ~30% of the elements on each side. Medians of groups of
+    # five are gathered at the front and their median found recursively
+    dest = lo
+    for start in range(lo, hi + 1, 5):
+        end = min(start + 4, hi)
+        _insertionSortRange(arr, start, end)
+        middle = (start + end)//2
+        arr[dest], arr[middle] = arr[middle], arr[dest]
+        dest += 1
+
+    position = lo + (dest - lo - 1)//2
+    _introSelect(arr, lo, dest - 1, position, 0)
+    return position
+
+def _threeWayPartition(arr, lo, hi, pivot):
+    # Dutch national flag partition of arr[lo:hi+1] into < pivot, == pivot
+    # and > pivot. Returns the bounds [lt, gt] of the equal block
+    lt, i, gt = lo, lo, hi
+    while i <= gt:
+        if arr[i] < pivot:
+            arr[lt], arr[i] = arr[i], arr[lt]
+            lt += 1
+            i  += 1
+        elif pivot < arr[i]:
+            arr[i], arr[gt] = arr[gt], arr[i]
+            gt -= 1
+        else:
+            i += 1
+    return lt, gt
+
+
+class _Reversed:
+    """
+    Wraps a value so comparisons run in the opposite order.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
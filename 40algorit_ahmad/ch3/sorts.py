@@ -1,4 +1,70 @@
-def bubbleSort(arr):
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import os
+
+
+def _decoratedSort(sort, arr, key, reverse):
+    '''
+    Sort arr in place by key and/or in reverse using any of the sorts below.
+
+    key is called exactly once per element. The sort then runs over
+    (key, index) pairs, so key objects are compared with < and == and the
+    elements themselves are never compared. Because ties are broken by
+    original position, every sort is stable when given a key or reverse,
+    including shellSort, selectionSort and quickSort, which are not stable
+    on their own. As with sorted(), reverse = True keeps equal elements in
+    their original order.
+
+    Parameters
+    ----------
+    - sort (function): One of the sorts in this module.
+    - arr (list): List to sort in place.
+    - key (function): Optional. Function of one argument returning the sort key.
+    - reverse (bool): Sort in descending order.
+
+    Returns
+    -------
+    arr if sort returns its input (quickSort), otherwise None.
+
+    Doctests
+    --------
+    >>> records = [("b", 2), ("a", 1), ("c", 2), ("d", 1), ("e", 3)]
+    >>> for sort in (bubbleSort, insertionSort, mergeSort, shellSort, selectionSort, quickSort):
+    ...     ascending, descending = list(records), list(records)
+    ...     _ = sort(ascending, key = lambda record: record[1])
+    ...     _ = sort(descending, key = lambda record: record[1], reverse = True)
+    ...     print([name for name, _ in ascending], [name for name, _ in descending])
+    ['a', 'd', 'b', 'c', 'e'] ['e', 'b', 'c', 'a', 'd']
+    ['a', 'd', 'b', 'c', 'e'] ['e', 'b', 'c', 'a', 'd']
+    ['a', 'd', 'b', 'c', 'e'] ['e', 'b', 'c', 'a', 'd']
+    ['a', 'd', 'b', 'c', 'e'] ['e', 'b', 'c', 'a', 'd']
+    ['a', 'd', 'b', 'c', 'e'] ['e', 'b', 'c', 'a', 'd']
+    ['a', 'd', 'b', 'c', 'e'] ['e', 'b', 'c', 'a', 'd']
+    >>> calls = []
+    >>> mergeSort(list(range(100)), key = lambda x: calls.append(x) or -x)
+    >>> len(calls)
+    100
+    '''
+    keys = arr if key is None else [key(item) for item in arr]
+
+    # Descending order is an ascending sort on (key, -index) read backwards,
+    # which leaves ties in ascending index order
+    sign      = -1 if reverse else 1
+    decorated = [(item_key, sign*i) for i, item_key in enumerate(keys)]
+    output    = sort(decorated)
+    if reverse:
+        decorated.reverse()
+
+    arr[:] = [arr[sign*i] for _, i in decorated]
+    return arr if output is not None else None
+
+def bubbleSort(arr, key = None, reverse = False):
+    # Sort by key/in reverse through (key, index) pairs
+    if key is not None or reverse:
+        return _decoratedSort(bubbleSort, arr, key, reverse)
+
     # Index i is the position where the element will bubble
     # to (minus 1 for in order to swap in the final position)
     for i in range(len(arr)-1, 0, -1):
@@ -10,7 +76,11 @@ def bubbleSort(arr):
                 # In place sort
                 arr[j], arr[j+1] = arr[j+1], arr[j]
 
-def insertionSort(arr):
+def insertionSort(arr, key = None, reverse = False):
+    # Sort by key/in reverse through (key, index) pairs
+    if key is not None or reverse:
+        return _decoratedSort(insertionSort, arr, key, reverse)
+
     # Index i is the element that we want to insert to the left
     # so i sweeps right to left
     for i in range(1, len(arr)):
@@ -31,55 +101,104 @@ def insertionSort(arr):
         # Slot element at i into spot j
         arr[j+1] = current_element
 
-def mergeSort(arr):
-    # Merge sort wants a single element
-    if len(arr) > 1:
-        # Find midpoint
-        midpoint = len(arr)//2
+def mergeSort(arr, key = None, reverse = False):
+    # Sort by key/in reverse through (key, index) pairs
+    if key is not None or reverse:
+        return _decoratedSort(mergeSort, arr, key, reverse)
 
-        # Split into left and right
-        left  = arr[:midpoint]
-        right = arr[midpoint:]
+    # Bottom-up, stable merge sort. Rather than slicing at every level it
+    # finds the runs already present in the input and merges neighbouring
+    # runs back and forth between arr and a single auxiliary buffer, so an
+    # already sorted (or reversed) input costs one pass
+    n = len(arr)
 
-        # Recursive call for merge sorting the left and right
-        mergeSort(left)
-        mergeSort(right)
+    # Split into runs, each at least _MIN_RUN long (except the last)
+    boundaries = _findRuns(arr)
 
-        # Actual sorting occurs here
-        # Placeholder indices
-        a = b = c = 0
-        
-        # a and b can be up to the length of the left/right lists
-        while a < len(left) and b < len(right):
-            # Start at the beginning of each list and
-            # pull the elements out in incremental order
-            if left[a] < right[b]:
-                arr[c] = left[a]
-                a = a + 1
+    # Merge sort wants a single run
+    if len(boundaries) <= 2:
+        return
+
+    # Ping-pong between the two buffers, halving the number of runs per pass
+    source, target = arr, [None]*n
+    while len(boundaries) > 2:
+        merged = [0]
+        for k in range(0, len(boundaries) - 1, 2):
+            start = boundaries[k]
+            if k + 2 < len(boundaries):
+                # Merge the pair of runs source[start:middle] and source[middle:end]
+                middle, end = boundaries[k + 1], boundaries[k + 2]
+                _mergeRuns(source, target, start, middle, end)
             else:
-                arr[c] = right[b]
-                b = b + 1
-
-            # Increment the length of the overall list
-            c = c + 1
-
-        # Loop through the remnants of the left and right hand sides
-        # for unequal lists. If the previous loop has been executed,
-        # then any remnant of the left or right lists will all be greater
-        # than the elements of the other list
-        # Left is longer than right, additional loop for the left
-        while a < len(left):
-            arr[c] = left[a]
-            a = a + 1
-            c = c + 1
-        
-        # Right is longer than left, additional loop for the right
-        while b < len(right):
-            arr[c] = right[b]
-            b = b + 1
-            c = c + 1
+                # Odd run out, copy it across unchanged
+                end = boundaries[k + 1]
+                target[start:end] = source[start:end]
+            merged.append(end)
+
+        boundaries     = merged
+        source, target = target, source
+
+    # Finished in the auxiliary buffer, copy back
+    if source is not arr:
+        arr[:] = source
+
+# Runs shorter than this are extended with insertion sort before merging
+_MIN_RUN = 32
+
+def _findRuns(arr):
+    # Returns run boundaries [0, ..., n] so that every arr[b[k]:b[k+1]] is
+    # sorted. Strictly descending runs are reversed in place (strictness
+    # keeps equal elements in order, so the sort stays stable)
+    n          = len(arr)
+    boundaries = [0]
+    start      = 0
+    while start < n:
+        end = start + 1
+        if end < n and arr[end] < arr[start]:
+            while end < n and arr[end] < arr[end - 1]:
+                end += 1
+            arr[start:end] = arr[start:end][::-1]
+        else:
+            while end < n and not arr[end] < arr[end - 1]:
+                end += 1
+
+        # Short natural runs are padded out to _MIN_RUN with binary insertion
+        if end - start < _MIN_RUN and end < n:
+            for i in range(end, min(start + _MIN_RUN, n)):
+                current_element = arr[i]
+                position        = bisect_right(arr, current_element, start, i)
+                arr[position + 1:i + 1] = arr[position:i]
+                arr[position]           = current_element
+            end = min(start + _MIN_RUN, n)
+
+        boundaries.append(end)
+        start = end
+    return boundaries
+
+def _mergeRuns(source, target, start, middle, end):
+    # Stable merge of source[start:middle] and source[middle:end] into
+    # target[start:end]. Ties take from the left run
+    a, b, c = start, middle, start
+    while a < middle and b < end:
+        if source[b] < source[a]:
+            target[c] = source[b]
+            b += 1
+        else:
+            target[c] = source[a]
+            a += 1
+        c += 1
+
+    # Remnants of whichever run is left over
+    if a < middle:
+        target[c:end] = source[a:middle]
+    else:
+        target[c:end] = source[b:end]
+
+def shellSort(arr, key = None, reverse = False):
+    # Sort by key/in reverse through (key, index) pairs
+    if key is not None or reverse:
+        return _decoratedSort(shellSort, arr, key, reverse)
 
-def shellSort(arr):
     # Define the distance between points to compare
     # Start with the element an increment of half the list away
     distance = len(arr)//2
@@ -111,7 +230,11 @@ def shellSort(arr):
         # Cut the distance in half
         distance = distance//2
 
-def selectionSort(arr):
+def selectionSort(arr, key = None, reverse = False):
+    # Sort by key/in reverse through (key, index) pairs
+    if key is not None or reverse:
+        return _decoratedSort(selectionSort, arr, key, reverse)
+
     # Fill from right to left
     # Index i is the location to put the ith largest
     # value
@@ -133,35 +256,412 @@ def selectionSort(arr):
         arr[i], arr[position_for_max_value] = arr[position_for_max_value], arr[i]
             
 
-def quickSort(arr):
-    # Get length of input list
+def quickSort(arr, key = None, reverse = False):
+    # Sort by key/in reverse through (key, index) pairs
+    if key is not None or reverse:
+        return _decoratedSort(quickSort, arr, key, reverse)
+
+    # In place introsort: quicksort with a median-of-three (ninther for
+    # large partitions) pivot and Hoare partitioning, insertion sort for
+    # small partitions and heapsort once recursion gets too deep, so the
+    # worst case stays O(n log n). Returns arr for convenience
     n = len(arr)
-    
+
     # Terminate if n <= 1
     if n <= 1:
         return arr
-    
-    # Sort small chunks using a different sort to remove 
-    # recursive calls. Define some arbitrary length to use this for
-    if n <= 15:
-        mergeSort(arr) 
+
+    # Allow ~2*log2(n) levels of partitioning before giving up on quicksort
+    _introSort(arr, 0, n - 1, 2*n.bit_length())
+    return arr
+
+# Partitions at or below this size are finished with insertion sort
+_INSERTION_CUTOFF = 16
+
+# Partitions above this size use the ninther (median of three medians) pivot
+_NINTHER_CUTOFF = 128
+
+def _introSort(arr, lo, hi, depth_limit):
+    # Sorts arr[lo:hi+1]. Recurse into the smaller side and loop on the
+    # larger one so the call stack never grows beyond O(log n)
+    while hi - lo + 1 > _INSERTION_CUTOFF:
+        # Too many bad pivots, heapsort is O(n log n) regardless of input
+        if depth_limit == 0:
+            _heapSort(arr, lo, hi)
+            return
+        depth_limit -= 1
+
+        split = _hoarePartition(arr, lo, hi)
+
+        if split - lo < hi - split:
+            _introSort(arr, lo, split, depth_limit)
+            lo = split + 1
+        else:
+            _introSort(arr, split + 1, hi, depth_limit)
+            hi = split
+
+    _insertionSortRange(arr, lo, hi)
+
+def _medianOfThree(arr, a, b, c):
+    # Index of the median of arr[a], arr[b] and arr[c]
+    if arr[a] < arr[b]:
+        if arr[b] < arr[c]: return b
+        return c if arr[a] < arr[c] else a
+    if arr[a] < arr[c]: return a
+    return c if arr[b] < arr[c] else b
+
+def _hoarePartition(arr, lo, hi):
+    # Choose the pivot and move it to the front of the partition. A pivot
+    # at arr[lo] guarantees the split point is in [lo, hi-1], so both sides
+    # always shrink
+    mid = (lo + hi)//2
+    if hi - lo + 1 > _NINTHER_CUTOFF:
+        step  = (hi - lo)//8
+        pivot = _medianOfThree(arr,
+                               _medianOfThree(arr, lo, lo + step, lo + 2*step),
+                               _medianOfThree(arr, mid - step, mid, mid + step),
+                               _medianOfThree(arr, hi - 2*step, hi - step, hi))
+    else:
+        pivot = _medianOfThree(arr, lo, mid, hi)
+    arr[lo], arr[pivot] = arr[pivot], arr[lo]
+    pivot = arr[lo]
+
+    # Walk inwards from both ends, swapping pairs on the wrong side. Elements
+    # equal to the pivot stop both scans, so runs of duplicates split evenly
+    i = lo - 1
+    j = hi + 1
+    while True:
+        i += 1
+        while arr[i] < pivot:
+            i += 1
+
+        j -= 1
+        while pivot < arr[j]:
+            j -= 1
+
+        if i >= j:
+            return j
+
+        arr[i], arr[j] = arr[j], arr[i]
+
+def _insertionSortRange(arr, lo, hi):
+    # Insertion sort of arr[lo:hi+1]
+    for i in range(lo + 1, hi + 1):
+        current_element = arr[i]
+        j = i - 1
+        while j >= lo and current_element < arr[j]:
+            arr[j+1] = arr[j]
+            j -= 1
+        arr[j+1] = current_element
+
+def _heapSort(arr, lo, hi):
+    # In place heapsort of arr[lo:hi+1] using a max heap rooted at lo
+    n = hi - lo + 1
+
+    # Build the heap from the last parent upwards
+    for root in range(n//2 - 1, -1, -1):
+        _siftDown(arr, lo, root, n)
+
+    # Repeatedly move the max to the end and restore the heap
+    for end in range(n - 1, 0, -1):
+        arr[lo], arr[lo + end] = arr[lo + end], arr[lo]
+        _siftDown(arr, lo, 0, end)
+
+def _siftDown(arr, lo, root, n):
+    # Sift arr[lo + root] down a heap of n elements starting at lo
+    item = arr[lo + root]
+    while True:
+        child = 2*root + 1
+        if child >= n:
+            break
+        if child + 1 < n and arr[lo + child] < arr[lo + child + 1]:
+            child += 1
+        if not item < arr[lo + child]:
+            break
+        arr[lo + root] = arr[lo + child]
+        root = child
+    arr[lo + root] = item
+
+def radixSort(arr):
+    # LSD radix sort of a whole NumPy array (or list) of ints or floats,
+    # sorted in place. Values are mapped to unsigned integer keys whose
+    # order matches the numeric order, then the keys are stably sorted one
+    # 16 bit digit at a time, least significant first. Each digit pass is a
+    # single vectorized counting sort (NumPy's stable sort of uint16 is a
+    # radix sort), so the whole sort is O(n) per digit
+    values = np.asarray(arr)
+    if values.ndim != 1:
+        raise TypeError(f"radixSort() expects a 1-D array, received {values.ndim}-D.")
+    keys   = _radixKeys(values)
+    if values.size == 0:
+        return
+
+    for shift in range(0, 8*keys.dtype.itemsize, 16):
+        # Casting to uint16 keeps only the low 16 bits
+        digits = (keys >> shift).astype(np.uint16)
+
+        # Skip digits that are the same for every key (e.g. the high bytes of small ints)
+        if digits.min() == digits.max():
+            continue
+
+        order  = np.argsort(digits, kind = 'stable')
+        keys   = keys[order]
+        values = values[order]
+
+    _writeBack(arr, values)
+
+def _radixKeys(values):
+    # Unsigned keys that sort in the same order as values
+    if values.dtype.kind == 'b':
+        return values.view(np.uint8)
+    if values.dtype.kind == 'u':
+        return values
+    unsigned = np.dtype(f'u{values.dtype.itemsize}')
+    sign_bit = unsigned.type(1 << (8*values.dtype.itemsize - 1))
+    if values.dtype.kind == 'i':
+        # Flipping the sign bit puts negatives before positives
+        return values.view(unsigned) ^ sign_bit
+    if values.dtype.kind == 'f':
+        # IEEE 754: flip every bit of negatives (larger magnitude sorts first)
+        # and just the sign bit of positives. NaNs go last, as in np.sort
+        bits = values.view(unsigned)
+        keys = np.where(bits & sign_bit, ~bits, bits | sign_bit)
+        keys[np.isnan(values)] = np.iinfo(unsigned).max
+        return keys
+    raise TypeError(f"radixSort() expects integers or floats, received dtype {values.dtype}.")
+
+def countingSort(arr):
+    # Counting sort of ints in place, O(n + range) time and O(range) memory.
+    # Best when the values span a small range (ages, ratings, bucket ids)
+    values = np.asarray(arr)
+    if values.ndim != 1:
+        raise TypeError(f"countingSort() expects a 1-D array, received {values.ndim}-D.")
+    if values.dtype.kind not in 'iub':
+        raise TypeError(f"countingSort() expects integers, received dtype {values.dtype}.")
+    if values.size == 0:
+        return
+
+    # Offsets from the minimum are taken in 64 bits of the input's own
+    # signedness, so uint64 values near 2**64 do not overflow int64
+    wide   = values.astype(np.int64 if values.dtype.kind == 'i' else np.uint64)
+    low    = wide.min()
+    counts = np.bincount((wide - low).astype(np.intp))
+    _writeBack(arr, np.repeat(low + np.arange(len(counts), dtype = wide.dtype), counts).astype(values.dtype))
+
+def _writeBack(arr, values):
+    # Copy sorted values into arr, which may be a NumPy array or a list
+    if isinstance(arr, np.ndarray):
+        arr[...] = values
+    else:
+        arr[:] = values.tolist()
+
+def autoSort(arr, key = None, reverse = False):
+    '''
+    Sort arr in place with the fastest applicable algorithm.
+
+    Lists or NumPy arrays of only ints (that fit in 64 bits) or only floats
+    are sorted with countingSort() when their values span a small range,
+    and with radixSort() otherwise. Anything else, or any call with a key,
+    falls back to the stable comparison mergeSort().
+
+    Parameters
+    ----------
+    - arr (list or numpy.ndarray): Values to sort in place.
+    - key (function): Optional. Function of one argument returning the sort key.
+    - reverse (bool): Sort in descending order.
+
+    Returns
+    -------
+    arr
+
+    Raises
+    ------
+    TypeError: arr is a NumPy array with more than one dimension
+
+    Doctests
+    --------
+    >>> autoSort([3, -1, 2, -7, 0])
+    [-7, -1, 0, 2, 3]
+    >>> autoSort(np.array([0.5, -0.0, float('nan'), -2.25, 1e300])).tolist()
+    [-2.25, -0.0, 0.5, 1e+300, nan]
+    >>> autoSort(["pear", "apple", "fig"], reverse = True)
+    ['pear', 'fig', 'apple']
+    >>> autoSort([2**63 + 3, 2**63 + 1, 1])
+    [1, 9223372036854775809, 9223372036854775811]
+    >>> autoSort(np.array([2**64 - 1, 2**64 - 3, 2**64 - 2], dtype = np.uint64)).tolist()
+    [18446744073709551613, 18446744073709551614, 18446744073709551615]
+    >>> autoSort(np.array([], dtype = float)).tolist(), autoSort(np.array([], dtype = np.int64)).tolist()
+    ([], [])
+    >>> autoSort(np.array([[2, 1], [4, 3]]))
+    Traceback (most recent call last):
+        ...
+    TypeError: autoSort() expects a 1-D array, received 2-D. Sort arr.ravel() or use np.sort(arr, axis = ...).
+    '''
+    if isinstance(arr, np.ndarray) and arr.ndim != 1:
+        raise TypeError(f"autoSort() expects a 1-D array, received {arr.ndim}-D. Sort arr.ravel() or use np.sort(arr, axis = ...).")
+    values = _numericArray(arr) if key is None else None
+
+    if values is None:
+        mergeSort(arr, key = key, reverse = reverse)
+        return arr
+
+    # Counting sort pays off when the range is no bigger than the input
+    if values.dtype.kind in 'iu' and values.size:
+        value_range = int(values.max()) - int(values.min()) + 1
+        if value_range <= max(2*values.size, 1 << 16):
+            countingSort(values)
+        else:
+            radixSort(values)
+    else:
+        radixSort(values)
+
+    _writeBack(arr, values[::-1] if reverse else values)
+    return arr
+
+def _numericArray(arr):
+    # A NumPy copy of arr if it holds only ints or only floats, else None
+    if isinstance(arr, np.ndarray):
+        return arr.copy() if arr.dtype.kind in 'iuf' else None
+
+    # Ints beyond int64 would come back as uint64, float64 or objects, and
+    # writing those back would change the caller's values or their types
+    kinds = set(map(type, arr))
+    if kinds == {int} or kinds == {float}:
+        values = np.asarray(arr)
+        return values if values.dtype.kind == ('i' if kinds == {int} else 'f') else None
+    return None
+
+# Splitter candidates sampled per bucket in parallelSort
+_OVERSAMPLE = 64
+
+# Buckets per worker in parallelSort, more buckets balance uneven splits
+_BUCKETS_PER_WORKER = 4
+
+def parallelSort(arr, workers = None, min_size = 1 << 16, seed = 8675309):
+    '''
+    Sort a NumPy array (or list) of ints or floats in place on several cores
+    with a sample sort.
+
+    The data is copied once into shared memory. A random sample picks
+    splitters that divide the value range into roughly equal buckets. Each
+    worker then counts, and afterwards scatters, its block of the input into
+    the buckets of a second shared buffer, and finally workers sort whole
+    buckets in place. Workers only ever receive shared memory names, offsets
+    and the splitters, never the data itself, so nothing is pickled.
+
+    Parameters
+    ----------
+    - arr (list or numpy.ndarray): Values to sort in place.
+    - workers (int): Optional. Number of worker processes. Default os.cpu_count().
+    - min_size (int): Inputs smaller than this are sorted serially. Default 65536.
+    - seed (int): Random seed for splitter sampling. Default 8675309.
+
+    Returns
+    -------
+    arr
+
+    Doctests
+    --------
+    >>> values = np.random.default_rng(0).integers(-1000, 1000, 5000)
+    >>> bool(np.array_equal(parallelSort(values.copy(), workers = 3, min_size = 0), np.sort(values)))
+    True
+    '''
+    values = np.asarray(arr)
+    if values.dtype.kind not in 'iuf':
+        raise TypeError(f"parallelSort() expects integers or floats, received dtype {values.dtype}.")
+
+    n       = values.size
+    workers = workers or os.cpu_count()
+    if workers <= 1 or n < max(min_size, 1):
+        _writeBack(arr, np.sort(values))
         return arr
-    
-    # Choose first element as the pivot
-    pivot = arr[0] 
-    
-    # Separate vector into three chunks
-    lhs = [x for x in arr if x < pivot]
-    rhs = [x for x in arr if x > pivot]
-    mid = [x for x in arr if x == pivot]
-    
-    # Recursively sort elements less than pivot (left hand side) and 
-    # elements greater than the pivot (right hand side)
-    return quickSort(lhs) + mid + quickSort(rhs)
 
+    # Splitters from a sorted random sample (NaNs always land in the last bucket)
+    buckets   = workers*_BUCKETS_PER_WORKER
+    sample    = values[np.random.default_rng(seed).integers(0, n, buckets*_OVERSAMPLE)]
+    sample    = np.sort(sample[~np.isnan(sample)] if values.dtype.kind == 'f' else sample)
+    splitters = sample[np.linspace(0, len(sample), buckets + 1).astype(np.int64)[1:-1]] if len(sample) else sample[:0]
+
+    source = SharedMemory(create = True, size = max(values.nbytes, 1))
+    target = SharedMemory(create = True, size = max(values.nbytes, 1))
+    try:
+        np.ndarray(n, dtype = values.dtype, buffer = source.buf)[:] = values.ravel()
+        spec   = (source.name, target.name, values.dtype.str, n)
+        blocks = np.linspace(0, n, workers + 1).astype(np.int64)
+
+        with ProcessPoolExecutor(workers) as pool:
+            # 1. Bucket sizes within each input block
+            counts = np.array(list(pool.map(_countBuckets,
+                                            [(spec, blocks[k], blocks[k + 1], splitters) for k in range(workers)])))
+
+            # 2. Every (block, bucket) pair gets its own slice of the target,
+            #    buckets in order and blocks in order within a bucket
+            bucket_starts = np.concatenate(([0], np.cumsum(counts.sum(axis = 0))))
+            offsets       = bucket_starts[:-1] + np.cumsum(counts, axis = 0) - counts
+            list(pool.map(_scatterBlock,
+                          [(spec, blocks[k], blocks[k + 1], splitters, offsets[k]) for k in range(workers)]))
+
+            # 3. Sort each bucket in place
+            list(pool.map(_sortBucket,
+                          [(spec, bucket_starts[b], bucket_starts[b + 1]) for b in range(len(splitters) + 1)]))
+
+        result = np.ndarray(n, dtype = values.dtype, buffer = target.buf)
+        _writeBack(arr, result.reshape(values.shape))
+        del result
+    finally:
+        for block in (source, target):
+            block.close()
+            block.unlink()
+
+    return arr
+
+def _attachShared(spec):
+    # Views of parallelSort's source and target buffers from inside a worker
+    source_name, target_name, dtype, n = spec
+    source, target = SharedMemory(name = source_name), SharedMemory(name = target_name)
+    return (source, target,
+            np.ndarray(n, dtype = dtype, buffer = source.buf),
+            np.ndarray(n, dtype = dtype, buffer = target.buf))
+
+def _countBuckets(task):
+    spec, lo, hi, splitters = task
+    source, target, source_view, _ = _attachShared(spec)
+    try:
+        bucket = np.searchsorted(splitters, source_view[lo:hi], side = 'right')
+        return np.bincount(bucket, minlength = len(splitters) + 1)
+    finally:
+        del source_view, _
+        source.close()
+        target.close()
+
+def _scatterBlock(task):
+    spec, lo, hi, splitters, offsets = task
+    source, target, source_view, target_view = _attachShared(spec)
+    block = source_view[lo:hi]
+    try:
+        bucket = np.searchsorted(splitters, block, side = 'right')
+        order  = np.argsort(bucket, kind = 'stable')
+        counts = np.bincount(bucket, minlength = len(splitters) + 1)
+        ends   = np.cumsum(counts)
+        for b, count in enumerate(counts.tolist()):
+            if count:
+                target_view[offsets[b]:offsets[b] + count] = block[order[ends[b] - count:ends[b]]]
+    finally:
+        del source_view, target_view, block
+        source.close()
+        target.close()
+
+def _sortBucket(task):
+    spec, lo, hi = task
+    source, target, source_view, target_view = _attachShared(spec)
+    try:
+        target_view[lo:hi].sort()
+    finally:
+        del source_view, target_view
+        source.close()
+        target.close()
 
 if __name__ == '__main__':
-    import numpy as np
     import random
     import time
 
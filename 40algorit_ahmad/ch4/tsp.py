@@ -4,12 +4,255 @@ Possible solutions to the travelling salesman problem
 
 # Imports ---------------------------------------------------------------------
 from argparse import ArgumentParser
-from itertools import permutations
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Value
+from itertools import islice, permutations
 from numpy import inf
+import copy
+import heapq
 import matplotlib.pyplot as plt
+import numpy as np
+import math
 import random
 import time
 
+# Classes ---------------------------------------------------------------------
+class SpatialTree:
+    """
+    Doctests
+    --------
+    >>> rng    = random.Random(1)
+    >>> cities = [[rng.randint(0, 9), rng.randint(0, 9)] for _ in range(300)]
+    >>> index  = SpatialTree(cities, leaf_size = 4)
+    >>> def bruteNearest(city, k):
+    ...     others = [c for c in range(len(cities)) if c != city]
+    ...     return sorted(others, key = lambda c: (math.hypot(cities[c][0] - cities[city][0],
+    ...                                                       cities[c][1] - cities[city][1]), c))[:k]
+    >>> all(index.nearest(city, 8) == bruteNearest(city, 8) for city in range(len(cities)))
+    True
+    """
+    # Bucket k-d tree over the cities for nearest neighbour queries that
+    # only look at nearby cities instead of every city or an n x n distance
+    # matrix. Cities are split at the median of the wider side of their
+    # bounding box until each bucket holds at most leaf_size, so the depth
+    # stays O(log n) however clustered the cities are. Cities are tracked
+    # by index, so duplicate coordinates are fine, and can be removed as
+    # they are used up
+    def __init__(self, cities, leaf_size = 16):
+        points = np.asarray(cities, dtype = float).reshape(-1, 2)
+        self.x  = points[:, 0]
+        self.y  = points[:, 1]
+        self.xs = self.x.tolist()
+        self.ys = self.y.tolist()
+        self.leaf_size = leaf_size
+        self.count     = len(points)
+
+        # Per node: bounding box of its cities, the region of the plane it
+        # covers, its split (axis, value), children and parent (-1 if
+        # none), cities left in it and, for buckets, the cities themselves
+        self.boxes   = []
+        self.regions = []
+        self.splits  = []
+        self.left    = []
+        self.right   = []
+        self.parent  = []
+        self.alive   = []
+        self.buckets = []
+        self.leaf_of = []
+        if len(points):
+            self._build()
+
+    def _build(self):
+        # Built a level at a time with whole-array operations. Each node is
+        # a contiguous segment of two copies of the cities, one sorted by x
+        # and one by y, so bounding boxes and medians are read off the ends
+        # of the segments, and splitting a node stably partitions both
+        # copies, which keeps them sorted, in O(n) per level
+        n       = len(self.xs)
+        by_x    = np.argsort(self.x, kind = 'stable')
+        by_y    = np.argsort(self.y, kind = 'stable')
+        starts  = np.zeros(1, dtype = np.intp)
+        sizes   = np.array([n], dtype = np.intp)
+        parents = [-1]
+        regions = [(-inf, -inf, inf, inf)]
+        leaf_of = np.empty(n, dtype = np.intp)
+        while True:
+            first = len(self.boxes)
+            count = len(sizes)
+            ends  = starts + sizes - 1
+            xmin, xmax = self.x[by_x[starts]], self.x[by_x[ends]]
+            ymin, ymax = self.y[by_y[starts]], self.y[by_y[ends]]
+            self.boxes.extend(zip(xmin.tolist(), ymin.tolist(), xmax.tolist(), ymax.tolist()))
+            self.regions.extend(regions)
+            self.splits.extend([None]*count)
+            self.left.extend([-1]*count)
+            self.right.extend([-1]*count)
+            self.parent.extend(parents)
+            self.alive.extend(sizes.tolist())
+            self.buckets.extend([None]*count)
+
+            # Small enough nodes become buckets, holding their cities in index order
+            leaves = sizes <= self.leaf_size
+            if leaves.any():
+                cities = by_x[np.repeat(leaves, sizes)]
+                owner  = np.repeat(first + np.flatnonzero(leaves), sizes[leaves])
+                leaf_of[cities] = owner
+                cities = cities[np.lexsort((cities, owner))].tolist()
+                bounds = np.cumsum(sizes[leaves]).tolist()
+                for node, lo, hi in zip((first + np.flatnonzero(leaves)).tolist(), [0] + bounds, bounds):
+                    self.buckets[node] = cities[lo:hi]
+
+            # The rest split in half along the wider side of their box.
+            # Equal coordinates are split by count, so both halves are never
+            # empty. Cities on the split line may end up on either side
+            split = ~leaves
+            if not split.any():
+                break
+            keep   = np.repeat(split, sizes)
+            by_x   = by_x[keep]
+            by_y   = by_y[keep]
+            nodes  = first + np.flatnonzero(split)
+            y_axis = (xmax - xmin < ymax - ymin)[split]
+            sizes  = sizes[split]
+            starts = np.cumsum(sizes) - sizes
+            half   = sizes//2
+
+            # The first half of each segment, along its axis, goes left
+            lower   = np.arange(len(by_x)) - np.repeat(starts, sizes) < np.repeat(half, sizes)
+            along_y = np.repeat(y_axis, sizes)
+            is_left = np.zeros(n, dtype = bool)
+            is_left[by_x[lower & ~along_y]] = True
+            is_left[by_y[lower & along_y]]  = True
+            values  = np.where(y_axis, self.y[by_y[starts + half]], self.x[by_x[starts + half]])
+            by_x    = _stablePartition(by_x, is_left, starts, sizes, half)
+            by_y    = _stablePartition(by_y, is_left, starts, sizes, half)
+
+            # Children are numbered in order on the next level
+            children = len(self.boxes)
+            regions, parents = [], []
+            for j, (node, axis, value) in enumerate(zip(nodes.tolist(), y_axis.tolist(), values.tolist())):
+                axis = int(axis)
+                self.splits[node] = (axis, value)
+                self.left[node], self.right[node] = children + 2*j, children + 2*j + 1
+                below, above = list(self.regions[node]), list(self.regions[node])
+                below[axis + 2], above[axis] = value, value
+                regions += [tuple(below), tuple(above)]
+                parents += [node, node]
+            starts = np.column_stack([starts, starts + half]).ravel()
+            sizes  = np.column_stack([half, sizes - half]).ravel()
+
+        self.leaf_of = leaf_of.tolist()
+
+    def remove(self, city):
+        node = self.leaf_of[city]
+        self.buckets[node].remove(city)
+        self.count -= 1
+
+        # Emptied subtrees are skipped by searches
+        while node >= 0:
+            self.alive[node] -= 1
+            node = self.parent[node]
+
+    def copy(self):
+        # Copy that cities can be removed from independently. Only the
+        # buckets and counts are copied, the rest of the tree is shared
+        other = copy.copy(self)
+        other.buckets = [None if bucket is None else list(bucket) for bucket in self.buckets]
+        other.alive   = list(self.alive)
+        return other
+
+    def order(self):
+        # Remaining cities bucket by bucket, left to right through the
+        # tree. Neighbouring buckets are close together, so this is a cheap
+        # route that mostly moves between nearby cities
+        route = []
+        nodes = [0] if self.count else []
+        while nodes:
+            node = nodes.pop()
+            if not self.alive[node]:
+                continue
+            if self.buckets[node] is None:
+                nodes += [self.right[node], self.left[node]]
+            else:
+                route += self.buckets[node]
+        return route
+
+    def nearestPoint(self, x, y):
+        # Index of the remaining city closest to (x, y), the lowest index
+        # on ties, or None if there are none left. Pure Python, as it is
+        # called once per city and only looks at a handful of cities
+        found = self._search(x, y, 1, None)
+        return found[0] if found else None
+
+    def nearest(self, city, k):
+        # The k cities closest to city (excluding itself), nearest first
+        return self._search(self.xs[city], self.ys[city], k, city)
+
+    def _search(self, x, y, k, exclude):
+        # Start at the bucket whose region holds (x, y) and climb towards
+        # the root, searching the other side of each split on the way up
+        # if its cities can be as close as the k-th best found so far. The
+        # climb stops once that is closer than every edge of the region
+        # searched. Ties go to the lowest index
+        xs, ys, boxes, alive = self.xs, self.ys, self.boxes, self.alive
+        left, right, buckets = self.left, self.right, self.buckets
+        if not self.count:
+            return []
+
+        node = 0
+        while buckets[node] is None:
+            axis, split = self.splits[node]
+            node = left[node] if (x if axis == 0 else y) < split else right[node]
+
+        best  = []                       # max heap of (-length, -city)
+        bound = inf
+        stack = [(0.0, node)]
+        while True:
+            # Depth first through the subtrees on the stack, nearer child first
+            while stack:
+                reach, top = stack.pop()
+                if reach > bound or not alive[top]:
+                    continue
+                bucket = buckets[top]
+                if bucket is None:
+                    reaches = []
+                    for child in (left[top], right[top]):
+                        xmin, ymin, xmax, ymax = boxes[child]
+                        dx = xmin - x if x < xmin else x - xmax if x > xmax else 0.0
+                        dy = ymin - y if y < ymin else y - ymax if y > ymax else 0.0
+                        reaches.append((math.hypot(dx, dy), child))
+                    if reaches[0][0] < reaches[1][0]:
+                        reaches.reverse()
+                    stack.extend(reaches)
+                    continue
+
+                for city in bucket:
+                    if city == exclude:
+                        continue
+                    entry = (-math.hypot(xs[city] - x, ys[city] - y), -city)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+                    else:
+                        continue
+                    if len(best) == k:
+                        bound = -best[0][0]
+
+            xmin, ymin, xmax, ymax = self.regions[node]
+            if node == 0 or min(x - xmin, xmax - x, y - ymin, ymax - y) > bound:
+                break
+            parent  = self.parent[node]
+            sibling = left[parent] if right[parent] == node else right[parent]
+            xmin, ymin, xmax, ymax = boxes[sibling]
+            dx = xmin - x if x < xmin else x - xmax if x > xmax else 0.0
+            dy = ymin - y if y < ymin else y - ymax if y > ymax else 0.0
+            stack.append((math.hypot(dx, dy), sibling))
+            node = parent
+
+        return [-city for _, city in sorted(best, reverse = True)]
+
 # Functions -------------------------------------------------------------------
 def constructCommandLineArguments():
     # Create ArgumentParser object
@@ -28,8 +271,26 @@ def constructCommandLineArguments():
     
     # Add command line input for method to use
     parser.add_argument("-m", "--method",
-                        help = "Method to use for solving the problem. Accepted inputs 'brute' for brute force or 'greedy' for greedy algorithm. Default: 'brute'.",
+                        help = "Method to use for solving the problem. Accepted inputs 'brute' for brute force, 'greedy' for greedy algorithm, 'heldkarp' for Held-Karp dynamic programming, 'branchbound' for parallel branch and bound or 'anneal' for simulated annealing within --budget-ms. Default: 'brute'.",
                         default = 'brute')
+
+    # Add command line input for the number of branch and bound workers
+    parser.add_argument("-w", "--workers",
+                        help = "Worker processes for 'branchbound'. Pass several (e.g. 1 2 4 8) to time each and report the speedup. Default: one per CPU.",
+                        nargs = "+",
+                        default = None,
+                        type = int)
+
+    # Add command line input for the simulated annealing time budget
+    parser.add_argument("-b", "--budget-ms",
+                        help = "Time budget in milliseconds for 'anneal', which returns the best tour found by then. Default: 200.",
+                        default = 200,
+                        type = float)
+
+    # Add command line input for improving the solution afterwards
+    parser.add_argument("-i", "--improve",
+                        help = "Local search to improve the solution with. Accepted inputs '2opt' for 2-opt and Or-opt moves. Default: no improvement.",
+                        default = None)
     
     # Return parser
     return parser
@@ -44,44 +305,120 @@ def generateCities(N,
     return [[random.randint(0, confines[0]), random.randint(0, confines[1])] for _ in range(N)]
 
 
-def calculateDistance(A, B):
-    # Euclidean distance
-    return ((A[0] - B[0])**2 + (A[1] - B[1])**2)**(1/2)
+def distanceMatrix(cities):
+    # Euclidean distance between every pair of cities, computed once with
+    # broadcasting so solvers can look distances up rather than recompute them
+    points = np.asarray(cities, dtype = float)
+    return np.sqrt(((points[:, None, :] - points[None, :, :])**2).sum(axis = -1))
 
 def totalDistance(city_order,
-                  cities):
-    # Initialize total distance
-    total_distance = 0
+                  cities,
+                  distances = None):
+    # Length of the closed tour visiting cities in city_order, where each
+    # element is an index into cities. The tour returns from the last city
+    # visited to the first
+    city_order = np.asarray(city_order, dtype = np.intp)
+    if len(city_order) < 2:
+        return 0.0
+
+    # Sum of the edges (city_order[i], city_order[i+1]), fancy indexed out
+    # of the distance matrix if there is one
+    next_order = np.roll(city_order, -1)
+    if distances is not None:
+        return float(distances[city_order, next_order].sum())
 
-    # Loop through city_order. Each element is an index
-    # corresponding to a given city in the cities list
-    for i in range(1, len(cities)):
-        city_A = cities[city_order[i-1]]
-        city_B = cities[city_order[i]]
+    points = np.asarray(cities, dtype = float)
+    return float(np.sqrt(((points[city_order] - points[next_order])**2).sum(axis = 1)).sum())
 
-        total_distance += calculateDistance(city_A, city_B)
+def reverseDelta(route, i, j, distances):
+    """
+    Doctests
+    --------
+    >>> cities    = generateCities(9)
+    >>> distances = distanceMatrix(cities)
+    >>> route     = [3, 1, 4, 0, 5, 8, 2, 7, 6]
+    >>> all(math.isclose(totalDistance(route, cities) + reverseDelta(route, i, j, distances),
+    ...                  totalDistance(route[:i] + route[i:j + 1][::-1] + route[j + 1:], cities))
+    ...     for i in range(9) for j in range(i, 9))
+    True
+    """
+    # Change in tour length from reversing route[i..j] (i <= j), in O(1).
+    # Only the two edges at the ends of the segment change: (a, b) and
+    # (c, d) become (a, c) and (b, d)
+    n = len(route)
+    if j - i >= n - 2:
+        # Reversing all but at most one city gives the same tour backwards
+        return 0.0
+    a, b = route[i - 1], route[i]
+    c, d = route[j], route[(j + 1) % n]
+    return float(distances[a, c] + distances[b, d] - distances[a, b] - distances[c, d])
 
-    # Finally, compute the distance from the endpoint back to the beginning
-    total_distance += calculateDistance(cities[-1], cities[0])
+def swapDelta(route, i, j, distances):
+    """
+    Doctests
+    --------
+    >>> cities    = generateCities(9)
+    >>> distances = distanceMatrix(cities)
+    >>> route     = [3, 1, 4, 0, 5, 8, 2, 7, 6]
+    >>> def swap(route, i, j):
+    ...     route = list(route)
+    ...     route[i], route[j] = route[j], route[i]
+    ...     return route
+    >>> all(math.isclose(totalDistance(route, cities) + swapDelta(route, i, j, distances),
+    ...                  totalDistance(swap(route, i, j), cities))
+    ...     for i in range(9) for j in range(9))
+    True
+    """
+    # Change in tour length from swapping the cities at positions i and j,
+    # in O(1). Edge k joins positions k and k+1, and only the (up to four)
+    # edges touching i or j change
+    n = len(route)
+    if n < 4:
+        # Every order of three or fewer cities is the same tour
+        return 0.0
 
-    return total_distance
+    def swapped(k):
+        k %= n
+        return route[j] if k == i else route[i] if k == j else route[k]
 
-def bruteForceSolution(cities, **kwargs):
+    edges  = {(i - 1) % n, i % n, (j - 1) % n, j % n}
+    before = sum(distances[route[k], route[(k + 1) % n]] for k in edges)
+    after  = sum(distances[swapped(k), swapped(k + 1)] for k in edges)
+    return float(after - before)
+
+def bruteForceSolution(cities, distances = None, **kwargs):
     # See if we need to time the experiment
     if kwargs.get('time'):
         start_ = time.time()
 
+    # Distances are looked up in one precomputed matrix
+    distances = distanceMatrix(cities) if distances is None else distances
+
     # Define best solution and best total distance
     best_route = None
     best_distance = inf
 
-    # Iterate through all possible solutions to find the best
-    for route in permutations(range(len(cities))):
-        distance = totalDistance(route, cities)
+    # Tours are cycles, so city 0 can be fixed as the start without losing
+    # any solutions, leaving (n-1)! orders of the rest
+    n = len(cities)
+    if n < 3:
+        best_route = tuple(range(n))
+        best_distance = totalDistance(best_route, cities, distances)
+    routes = permutations(range(1, n)) if n >= 3 else iter(())
+
+    # Iterate through all possible solutions to find the best, scoring a
+    # block of routes at a time with fancy-indexed sums
+    while True:
+        block = np.array(list(islice(routes, 65536)), dtype = np.intp)
+        if not len(block):
+            break
+        block = np.hstack([np.zeros((len(block), 1), dtype = np.intp), block])
+        lengths = distances[block, np.roll(block, -1, axis = 1)].sum(axis = 1)
 
-        if distance < best_distance:
-            best_route    = route
-            best_distance = distance
+        best = int(np.argmin(lengths))
+        if lengths[best] < best_distance:
+            best_route    = tuple(block[best].tolist())
+            best_distance = float(lengths[best])
 
     # End timing if applicable
     if kwargs.get('time'):
@@ -89,76 +426,585 @@ def bruteForceSolution(cities, **kwargs):
     
     return {"Route": best_route, "Distance": best_distance}
 
+def heldKarpSolution(cities, distances = None, max_cities = 23, **kwargs):
+    """
+    Doctests
+    --------
+    >>> all(abs(heldKarpSolution(generateCities(n))['Distance'] -
+    ...         bruteForceSolution(generateCities(n))['Distance']) < 1e-6 for n in range(1, 9))
+    True
+    >>> heldKarpSolution(generateCities(30))
+    Traceback (most recent call last):
+        ...
+    ValueError: Held-Karp on 30 cities needs a 62.3 GB table, the limit is 23 cities (max_cities).
+    """
+    # Exact solution by dynamic programming over subsets of cities in
+    # O(2^n n^2) time rather than O(n!). City 0 is fixed as the start, and
+    # cost[mask, j] is the length of the shortest path that leaves city 0,
+    # visits exactly the cities in mask (bit j-1 for city j) and ends at j
+    if kwargs.get('time'):
+        start_ = time.time()
+
+    # The float32 table has 2^(n-1) x (n-1) entries, which is ~370 MB at
+    # 23 cities and doubles with every city after that
+    n = len(cities)
+    if n > max_cities:
+        size = (1 << (n - 1))*(n - 1)*4/1e9
+        raise ValueError(f"Held-Karp on {n} cities needs a {size:.1f} GB table, the limit is {max_cities} cities (max_cities).")
+
+    # Pairwise distances between all cities
+    distances = distanceMatrix(cities) if distances is None else distances
+
+    if n <= 2:
+        route = list(range(n))
+        return {"Route": route, "Distance": totalDistance(route, cities, distances)}
+
+    # Memory is what limits Held-Karp, so the table is float32 (half of
+    # float64) and no parent pointers are stored; the route is recovered
+    # afterwards by redoing the minimization along it
+    m     = n - 1
+    inner = distances[1:, 1:].astype(np.float32)
+    cost  = np.full((1 << m, m), np.inf, dtype = np.float32)
+    cost[1 << np.arange(m), np.arange(m)] = distances[0, 1:]
+
+    # Fill the table one subset size at a time. Every subset of size k only
+    # reads subsets of size k-1, so each layer is a few vectorized gathers
+    masks     = np.arange(1 << m)
+    set_sizes = np.zeros(1 << m, dtype = np.uint8)
+    for j in range(m):
+        set_sizes += (masks >> j) & 1 == 1
+    for size in range(2, m + 1):
+        layer = masks[set_sizes == size]
+        for j in range(m):
+            ending   = layer[(layer >> j) & 1 == 1]
+            previous = ending ^ (1 << j)
+            cost[ending, j] = (cost[previous] + inner[:, j]).min(axis = 1)
+
+    # Close the tour back to city 0, then walk the table backwards
+    mask    = (1 << m) - 1
+    current = int(np.argmin(cost[mask] + distances[1:, 0]))
+    route   = []
+    while True:
+        route.append(current + 1)
+        previous = mask ^ (1 << current)
+        if previous == 0:
+            break
+        current, mask = int(np.argmin(cost[previous] + inner[:, current])), previous
+    route = [0] + route[::-1]
+
+    # End timing if applicable
+    if kwargs.get('time'):
+        print(f"Execution Time: {round(time.time() - start_, 3)}")
+
+    return {"Route": route, "Distance": totalDistance(route, cities, distances)}
+
+def branchAndBoundSolution(cities,
+                           distances = None,
+                           workers = None,
+                           depth = 2,
+                           **kwargs):
+    """
+    Doctests
+    --------
+    >>> cities = generateCities(8)
+    >>> result = branchAndBoundSolution(cities, workers = 2)
+    >>> math.isclose(result['Distance'], heldKarpSolution(cities)['Distance']), sorted(result['Route']) == list(range(8))
+    (True, True)
+    """
+    # Exact solution by depth first branch and bound, spread over a pool of
+    # processes. City 0 is fixed as the start and the search tree is split
+    # into one task per route prefix of depth cities after it. A partial
+    # route is abandoned once its length plus a lower bound on the rest
+    # (the minimum spanning tree of the unvisited cities and both ends of
+    # the partial route, which the rest of any tour must span) reaches the
+    # best tour found so far by any worker
+    if kwargs.get('time'):
+        start_ = time.time()
+
+    # Distances are looked up in one precomputed matrix
+    distances = distanceMatrix(cities) if distances is None else distances
+    n = len(cities)
+
+    # A good tour to start from makes pruning effective from the first task
+    initial = localSearchSolution(greedySolution(cities)['Route'], cities)
+    best_route, best_distance = initial['Route'], totalDistance(initial['Route'], cities, distances)
+    best_route = best_route[best_route.index(0):] + best_route[:best_route.index(0)]
+    nodes = 0
+
+    if n > 3:
+        # Prefixes with the most promising (lowest bound) first
+        depth    = min(depth, n - 2)
+        prefixes = [(0,)]
+        for _ in range(depth):
+            prefixes = [prefix + (city,) for prefix in prefixes for city in range(1, n) if city not in prefix]
+        rows = distances.tolist()
+        def bound(prefix):
+            rest = [city for city in range(1, n) if city not in prefix]
+            return _pathLength(rows, prefix) + _spanningTreeLength(distances, [prefix[-1], 0] + rest)
+        prefixes.sort(key = bound)
+
+        # Best distance found so far, shared by every worker
+        incumbent = Value('d', best_distance)
+        with ProcessPoolExecutor(max_workers = workers,
+                                 initializer = _initBranchAndBound,
+                                 initargs = (distances, incumbent)) as executor:
+            for route, distance, expanded in executor.map(_branchAndBoundTask, prefixes):
+                nodes += expanded
+                if route is not None and distance < best_distance:
+                    best_route, best_distance = route, distance
+
+    # End timing if applicable
+    if kwargs.get('time'):
+        print(f"Execution Time: {round(time.time() - start_, 3)}")
+
+    return {"Route": list(best_route), "Distance": best_distance, "Nodes": nodes}
+
+def benchmarkBranchAndBound(cities, worker_counts, **kwargs):
+    # Time branchAndBoundSolution with each number of workers, reporting
+    # nodes expanded and the speedup over the first worker count
+    distances = distanceMatrix(cities)
+    results   = []
+    for workers in worker_counts:
+        start_   = time.time()
+        solution = branchAndBoundSolution(cities, distances = distances, workers = workers, **kwargs)
+        seconds  = time.time() - start_
+        results.append({"workers": workers, "seconds": seconds, "nodes": solution["Nodes"],
+                        "speedup": results[0]["seconds"]/seconds if results else 1.0,
+                        "Route": solution["Route"], "Distance": solution["Distance"]})
+    return results
+
+# Branch and bound worker state, set once per process by _initBranchAndBound.
+# _bb_best is the raw double inside the shared incumbent Value: it is read on
+# every node without taking the lock, which is only held to lower it
+_bb_distances = None
+_bb_rows      = None
+_bb_incumbent = None
+_bb_best      = None
+
+def _initBranchAndBound(distances, incumbent):
+    global _bb_distances, _bb_rows, _bb_incumbent, _bb_best
+    _bb_distances = distances
+    _bb_rows      = distances.tolist()
+    _bb_incumbent = incumbent
+    _bb_best      = incumbent.get_obj()
+
+def _branchAndBoundTask(prefix):
+    # Search every tour starting with prefix. Returns the best tour found
+    # that beat the shared incumbent (or None), its length and the number
+    # of nodes expanded
+    rows      = _bb_rows
+    remaining = [city for city in range(len(rows)) if city not in prefix]
+    best      = [None, inf]
+    expanded  = 0
+
+    def search(route, length):
+        nonlocal expanded
+        expanded += 1
+        last = route[-1]
+
+        if len(route) == len(rows):
+            length += rows[last][0]
+            if length < _bb_best.value:
+                with _bb_incumbent.get_lock():
+                    if length < _bb_best.value:
+                        _bb_best.value = length
+                best[:] = [list(route), length]
+            return
+
+        if length + _spanningTreeLength(_bb_distances, [last, 0] + remaining) >= _bb_best.value:
+            return
+
+        # Nearest cities first, to find short tours early
+        for city in sorted(remaining, key = rows[last].__getitem__):
+            remaining.remove(city)
+            route.append(city)
+            search(route, length + rows[last][city])
+            route.pop()
+            remaining.append(city)
+
+    search(list(prefix), _pathLength(rows, prefix))
+    return best[0], best[1], expanded
+
+def _pathLength(rows, path):
+    # Length of an open path
+    return sum(rows[a][b] for a, b in zip(path, path[1:]))
+
+def _spanningTreeLength(distances, nodes):
+    # Length of the minimum spanning tree of nodes, by Prim's algorithm
+    sub     = distances[np.ix_(nodes, nodes)]
+    nearest = sub[0].copy()
+    in_tree = np.zeros(len(nodes), dtype = bool)
+    in_tree[0] = True
+    total = 0.0
+    for _ in range(len(nodes) - 1):
+        nearest[in_tree] = inf
+        j = int(np.argmin(nearest))
+        total += nearest[j]
+        in_tree[j] = True
+        nearest = np.minimum(nearest, sub[j])
+    return total
+
 def greedySolution(cities, 
                    start = 0,
+                   distances = None,
+                   index = None,
+                   deadline = None,
                    **kwargs):
+    """
+    Doctests
+    --------
+    >>> def bruteForceWalk(cities):
+    ...     route, left = [0], set(range(1, len(cities)))
+    ...     while left:
+    ...         x, y = cities[route[-1]]
+    ...         route.append(min(left, key = lambda c: (math.hypot(cities[c][0] - x, cities[c][1] - y), c)))
+    ...         left.remove(route[-1])
+    ...     return route
+    >>> rng = random.Random(2)
+    >>> tests = [[[rng.randint(0, 6), rng.randint(0, 6)] for _ in range(n)] for n in (1, 2, 17, 40, 400)]
+    >>> all(greedySolution(cities)['Route'] == bruteForceWalk(cities) for cities in tests)
+    True
+    """
     # Time algorithm if specified
     if kwargs.get('time'):
         start_ = time.time()
 
+    # Cities go in a spatial index that finds the nearest unvisited city
+    # by looking only at nearby buckets, and visited cities are removed.
+    # A prebuilt index can be passed in, and is used up the same way
+    index = SpatialTree(cities) if index is None else index
+    index.remove(start)
+
     # Initialize the route
-    route = [start]
+    route   = [start]
+    current = start
+
+    # Iterate through remaining cities until none are left. With a
+    # deadline (a time.time() value), stop once it passes, leaving the
+    # route unfinished
+    for step in range(len(cities) - 1):
+        if deadline is not None and step % 256 == 0 and time.time() >= deadline:
+            break
+
+        # Find nearest city that has not been visited
+        current = index.nearestPoint(index.xs[current], index.ys[current])
+
+        # Add to route and remove from the remaining cities
+        route.append(current)
+        index.remove(current)
+
+    # End timing if applicable
+    if kwargs.get('time'):
+        print(f"Execution Time: {round(time.time() - start_, 3)}")
+    
+    return {'Route': route, 'Distance': totalDistance(route, cities, distances)}
+
+def localSearchSolution(route,
+                        cities,
+                        neighbors = 8,
+                        or_opt = True,
+                        **kwargs):
+    """
+    Doctests
+    --------
+    >>> cities = generateCities(300)
+    >>> route  = random.Random(3).sample(range(300), 300)
+    >>> result = localSearchSolution(route, cities)
+    >>> sorted(result['Route']) == list(range(300)), result['Distance'] < totalDistance(route, cities)
+    (True, True)
+    """
+    # Improve a route with 2-opt moves (replace two edges by reversing the
+    # path between them) and Or-opt moves (move a run of 1-3 cities to
+    # another edge, either way round) until no improving move is left.
+    # To scale to large instances, only moves creating an edge from a city
+    # to one of its nearest neighbors are tried, and "don't look bits" keep
+    # a queue of the cities whose surroundings have changed, so settled
+    # parts of the route are not searched again
+    if kwargs.get('time'):
+        start_ = time.time()
+
+    n = len(route)
+    if n < 5:
+        return {"Route": list(route), "Distance": totalDistance(route, cities)}
+
+    # Distances come from the coordinates, an n x n matrix would not fit
+    # in memory for the sizes this is meant for
+    points = np.asarray(cities, dtype = float)
+    xs, ys = points[:, 0].tolist(), points[:, 1].tolist()
+    def dist(a, b):
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    # Candidate lists of nearby cities
+    index      = SpatialTree(points)
+    candidates = [index.nearest(city, neighbors) for city in range(n)]
+
+    # Route as an array of cities, and the position of every city in it
+    tour = np.array(route, dtype = np.intp)
+    pos  = np.empty(n, dtype = np.intp)
+    pos[tour] = np.arange(n)
+
+    def succ(city):
+        return int(tour[(pos[city] + 1) % n])
 
-    # Get current city
-    current_city = cities[start]
+    def pred(city):
+        return int(tour[pos[city] - 1])
 
-    # Establish remaining cities (minus the one we are at now)
-    remaining_cities = [x for x in cities if x != current_city]
+    # Cities to search from, with their don't look bit off
+    queue  = deque(tour.tolist())
+    active = np.ones(n, dtype = bool)
+    def wake(*woken):
+        for city in woken:
+            if not active[city]:
+                active[city] = True
+                queue.append(city)
 
-    # Iterate through remaining cities until none are left
-    while len(remaining_cities) > 0:
-        # Find nearest city
-        nearest_neighbor = findNearestNeighbor(current_city, remaining_cities)
+    while queue:
+        a = queue.popleft()
+        active[a] = False
 
-        # Get index of neighbor in total list of cities
-        nearest_neighbor_index = cities.index(nearest_neighbor)
+        # 2-opt: for a's edge to its successor (then predecessor) b, try a
+        # neighbor c that is closer to a than b, and c's successor
+        # (predecessor) d. Edges (a, b) and (c, d) become (a, c) and (b, d)
+        improved = False
+        for forward in (True, False):
+            b = succ(a) if forward else pred(a)
+            ab = dist(a, b)
+            for c in candidates[a]:
+                ac = dist(a, c)
+                if ac >= ab:
+                    break
+                d = succ(c) if forward else pred(c)
+                if c == b or d == a:
+                    continue
+                if ab + dist(c, d) - ac - dist(b, d) > 1e-9:
+                    if forward:
+                        _reverseSegment(tour, pos, pos[b], pos[c])
+                    else:
+                        _reverseSegment(tour, pos, pos[a], pos[d])
+                    wake(a, b, c, d)
+                    improved = True
+                    break
+            if improved:
+                break
+        if improved or not or_opt:
+            continue
 
-        # Add to route
-        route.append(nearest_neighbor_index)
+        # Or-opt: move the run of 1-3 cities starting at a to between a
+        # neighbor of either end of the run and that neighbor's successor
+        # or predecessor, whichever way round is shorter
+        for length in (1, 2, 3):
+            start  = pos[a]
+            run    = [int(tour[(start + k) % n]) for k in range(length)]
+            first, last = run[0], run[-1]
+            p, nx  = pred(first), succ(last)
+            if nx == p or nx in run:
+                break
+            removed = dist(p, first) + dist(last, nx) - dist(p, nx)
 
-        # Update current city
-        current_city = nearest_neighbor
+            best = None
+            for c in candidates[first] + candidates[last]:
+                if c in run:
+                    continue
+                for u, v in ((c, succ(c)), (pred(c), c)):
+                    if v in run or u in run:
+                        continue
+                    uv = dist(u, v)
+                    for reverse, added in ((False, dist(u, first) + dist(last, v) - uv),
+                                           (True, dist(u, last) + dist(first, v) - uv)):
+                        gain = removed - added
+                        if gain > 1e-9 and (best is None or gain > best[0]):
+                            best = (gain, u, reverse)
+            if best is not None:
+                _, u, reverse = best
+                v = succ(u)
+                _moveSegment(tour, pos, start, length, int(pos[u]), reverse)
+                wake(p, nx, u, v, *run)
+                improved = True
+                break
 
-        # Remove new current city from list of possible cities remaining
-        remaining_cities.remove(nearest_neighbor)
+    route = tour.tolist()
 
     # End timing if applicable
     if kwargs.get('time'):
         print(f"Execution Time: {round(time.time() - start_, 3)}")
-    
-    return {'Route': route}
 
-def findNearestNeighbor(city, cities):
-    # Find C in list of cities that minimizes the distance between
-    # the input city and the list of available cities
-    return min(cities, key = lambda C: calculateDistance(city, C))
+    return {"Route": route, "Distance": totalDistance(route, cities)}
+
+def annealSolution(cities,
+                   budget_ms = 200,
+                   neighbors = 8,
+                   seed = 8675309,
+                   stop = None,
+                   **kwargs):
+    """
+    Doctests
+    --------
+    >>> annealSolution([[5, 5]]*6)['Distance']
+    0.0
+    >>> cities = generateCities(300)
+    >>> result = annealSolution(cities, budget_ms = 50)
+    >>> sorted(result['Route']) == list(range(300)), result['Distance'] <= greedySolution(cities)['Distance']
+    (True, True)
+    """
+    # Anytime simulated annealing, seeded with the greedy route. If greedy
+    # cannot finish in half the budget, the cities it had no time for are
+    # added in the spatial index's bucket order. Each step proposes a 2-opt
+    # move joining a random city to one of its nearest neighbors, scored
+    # in O(1) from the four edge lengths involved, and accepts it if it
+    # shortens the route, or with probability
+    # exp(-increase/temperature) if not. The temperature cools
+    # geometrically over the time budget, so the search settles as time
+    # runs out. It stops at the budget, when stop() returns True, or on
+    # KeyboardInterrupt, and returns the best route seen along with a trace
+    # of (milliseconds, best distance): the seed, then each improvement.
+    # Only building the spatial index is not checked against the budget
+    start_   = time.time()
+    deadline = start_ + budget_ms/1000
+
+    points = np.asarray(cities, dtype = float).reshape(-1, 2)
+    xs, ys = points[:, 0].tolist(), points[:, 1].tolist()
+    def dist(a, b):
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    # One index serves the seed and the moves. Candidate lists are only
+    # built for the cities that get picked, so large instances do not
+    # spend the budget before the first move
+    index   = SpatialTree(points)
+    walk    = index.copy()
+    route   = greedySolution(points, index = walk, deadline = start_ + budget_ms/2000)['Route']
+    route  += walk.order()
+    n       = len(route)
+    current = totalDistance(route, points)
+    trace   = [(round((time.time() - start_)*1000, 3), current)]
+
+    # Every tour of a zero length seed (all cities on one point) is as short
+    if n < 5 or current == 0:
+        return {"Route": route, "Distance": current, "Trace": trace, "Iterations": 0}
+    candidates = [None]*n
+
+    tour = np.array(route, dtype = np.intp)
+    pos  = np.empty(n, dtype = np.intp)
+    pos[tour] = np.arange(n)
+    rng  = random.Random(seed)
+
+    # Temperatures relative to the average edge of the starting route
+    start_temperature = 0.1*current/n
+    end_temperature   = 0.001*current/n
+    temperature       = start_temperature
+
+    # The best route is only copied out when the search is about to leave it
+    best, best_tour, unsaved = current, tour.copy(), False
+    iterations = 0
+    try:
+        while True:
+            if iterations % 256 == 0:
+                now = time.time()
+                if now >= deadline or (stop is not None and stop()):
+                    break
+                progress    = (now - start_)/(deadline - start_)
+                temperature = start_temperature*(end_temperature/start_temperature)**progress
+                if best < trace[-1][1]:
+                    trace.append((round((now - start_)*1000, 3), best))
+            iterations += 1
+
+            a = rng.randrange(n)
+            if candidates[a] is None:
+                candidates[a] = index.nearest(a, neighbors)
+            c = rng.choice(candidates[a])
+
+            # Edges (a, b) and (c, d) become (a, c) and (b, d), with b and d
+            # the successors of a and c, or both predecessors
+            ia, ic = int(pos[a]), int(pos[c])
+            if rng.random() < 0.5:
+                b, d = int(tour[(ia + 1) % n]), int(tour[(ic + 1) % n])
+                segment = ((ia + 1) % n, ic)
+            else:
+                b, d = int(tour[ia - 1]), int(tour[ic - 1])
+                segment = (ia, (ic - 1) % n)
+            if c == b or d == a:
+                continue
+            delta = dist(a, c) + dist(b, d) - dist(a, b) - dist(c, d)
+
+            if delta < 0 or rng.random() < math.exp(-delta/temperature):
+                if unsaved and delta >= 0:
+                    best_tour, unsaved = tour.copy(), False
+                _reverseSegment(tour, pos, *segment)
+                current += delta
+                if current < best:
+                    best, unsaved = current, True
+    except KeyboardInterrupt:
+        pass
+
+    if unsaved:
+        best_tour = tour.copy()
+    route = best_tour.tolist()
+    distance = totalDistance(route, points)
+    if distance < trace[-1][1]:
+        trace.append((round((time.time() - start_)*1000, 3), distance))
+
+    # End timing if applicable
+    if kwargs.get('time'):
+        print(f"Execution Time: {round(time.time() - start_, 3)}")
+
+    return {"Route": route, "Distance": distance, "Trace": trace, "Iterations": iterations}
+
+def _stablePartition(order, is_left, starts, sizes, half):
+    # Reorder each segment order[starts[i]:starts[i] + sizes[i]] so its
+    # half[i] cities with is_left set come first, keeping the order within
+    # both parts
+    left     = is_left[order]
+    offset   = np.repeat(starts, sizes)
+    before   = np.cumsum(left) - left
+    before  -= np.repeat(before[starts], sizes)
+    position = np.arange(len(order)) - offset
+    target   = offset + np.where(left, before, np.repeat(half, sizes) + position - before)
+    result   = np.empty_like(order)
+    result[target] = order
+    return result
+
+def _reverseSegment(tour, pos, i, j):
+    # Reverse tour positions i..j (wrapping around the end). Reversing the
+    # rest of the tour instead gives the same cycle, so the shorter is done
+    n      = len(tour)
+    length = (j - i) % n + 1
+    if 2*length > n:
+        i, length = (j + 1) % n, n - length
+    index = (i + np.arange(length)) % n
+    tour[index] = tour[index[::-1]]
+    pos[tour[index]] = index
+
+def _moveSegment(tour, pos, start, length, after, reverse):
+    # Move the run of length cities at tour position start to between the
+    # city at position after and its successor, by rotating the cities in
+    # between past it, going whichever way round has fewer of them
+    n       = len(tour)
+    between = (after - (start + length)) % n + 1
+    if between <= n - length - between:
+        index = (start + np.arange(length + between)) % n
+        tour[index] = np.roll(tour[index], -length)
+        moved = index[between:]
+    else:
+        first = (after + 1) % n
+        index = (first + np.arange(n - between)) % n
+        tour[index] = np.roll(tour[index], length)
+        moved = index[:length]
+    if reverse:
+        tour[moved] = tour[moved[::-1]]
+    pos[tour[index]] = index
 
 def plotSolution(route, cities):
     # Create figure
     plt.figure(figsize = (12,7))
 
     # Plot lines connecting cities first so points can be 
-    # overlaid on top
-    # Connect end of route to starting point
-    city_A = cities[route[-1]]
-    city_B = cities[route[0]]
-
-    plt.plot([city_A[0], city_B[0]],
-             [city_A[1], city_B[1]],
-             "b-")
-    
-    # Iterate through path
-    for i in range(1, len(route)):
-        city_A = cities[route[i-1]]
-        city_B = cities[route[i]]
-
-        plt.plot([city_A[0], city_B[0]],
-                 [city_A[1], city_B[1]],
-                 "b-")
+    # overlaid on top. The route is drawn as one line, closed by
+    # repeating the starting city at the end
+    points = np.asarray(cities, dtype = float)
+    path   = points[list(route) + [route[0]]]
+    plt.plot(path[:, 0], path[:, 1], "b-")
         
     # Plot points on the graph corresponding to cities
-    for city in cities:
-        plt.scatter(city[0], city[1], s = 50, c = "k")
+    plt.scatter(points[:, 0], points[:, 1], s = 50, c = "k")
 
     # Show plot
     plt.show()
@@ -175,12 +1021,42 @@ def main():
     # Generate city
     cities = generateCities(args.num)
 
+    # Distances between cities, shared by the exact solvers. Greedy uses
+    # a spatial index instead, as n x n distances would not fit in memory
+    # for the sizes it can handle
+    distances = distanceMatrix(cities) if args.method in ('brute', 'heldkarp', 'branchbound') else None
+
     # Solve TSP
     if args.method == 'brute':
-        solution = bruteForceSolution(cities, time = args.time)
+        solution = bruteForceSolution(cities, distances = distances, time = args.time)
 
     if args.method == 'greedy':
-        solution = greedySolution(cities, time = args.time)
+        solution = greedySolution(cities, distances = distances, time = args.time)
+
+    if args.method == 'heldkarp':
+        solution = heldKarpSolution(cities, distances = distances, time = args.time)
+
+    if args.method == 'branchbound':
+        if args.workers and len(args.workers) > 1:
+            # Report nodes expanded and speedup for each worker count
+            results = benchmarkBranchAndBound(cities, args.workers)
+            print(f"{'Workers':>8} {'Seconds':>10} {'Nodes':>12} {'Speedup':>8}")
+            for row in results:
+                print(f"{row['workers']:>8} {row['seconds']:>10.3f} {row['nodes']:>12} {row['speedup']:>8.2f}")
+            solution = results[-1]
+        else:
+            solution = branchAndBoundSolution(cities, distances = distances, time = args.time,
+                                              workers = args.workers[0] if args.workers else None)
+            print(f"Nodes Expanded: {solution['Nodes']}")
+
+    if args.method == 'anneal':
+        solution = annealSolution(cities, budget_ms = args.budget_ms, time = args.time)
+        print(f"Distance: {solution['Distance']:.3f} after {solution['Iterations']} moves "
+              f"({len(solution['Trace']) - 1} improvements recorded)")
+
+    # Improve route
+    if args.improve == '2opt':
+        solution = localSearchSolution(solution['Route'], cities, time = args.time)
 
         
     # Plot route